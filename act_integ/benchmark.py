@@ -0,0 +1,241 @@
+"""Scaling benchmark for TrafficModel.step.
+
+Runs the model headless at fixed seeds with growing starting populations
+(the same number of vehicles and pedestrians) and records steps/sec,
+per-phase step timings and peak memory. A few warm-up steps run first and
+are left out of the timings, so one-off work at the start of a run does
+not stand in for steady state. Starting vehicles are spread along
+their routes, but the roads only hold a few dozen at a safe distance; the
+rest queue at the entries, parked. Each case reports the mean share of
+parked vehicles, so saturated cases can be told apart from moving traffic.
+Results are written as JSON so two commits can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from models.clock import DEFAULT_DT
+from models.profiler import Profiler
+from models.traffic_model import TrafficModel
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_STEPS = 200
+DEFAULT_WARMUP = 20  # Untimed steps before each case is measured
+DEFAULT_BUDGET_S = 30.0  # Wall-clock cap per case, large populations stop early
+REGRESSION_THRESHOLD = 0.10  # Relative slowdown or memory growth that is flagged
+
+
+def _model(size: int, seed: int, dt: float, profiler=None) -> TrafficModel:
+    parameters = {"seed": seed, "dt": dt, "vehicles": size, "pedestrians": size}
+    return TrafficModel(profiler=profiler, parameters=parameters)
+
+
+def _peak_memory(size: int, steps: int, seed: int, dt: float) -> int:
+    """Peak traced Python allocation in bytes while building and stepping"""
+    tracemalloc.start()
+    try:
+        model = _model(size, seed, dt)
+        for _ in range(steps):
+            model.step()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(
+    size: int,
+    steps: int = DEFAULT_STEPS,
+    seed: int = 1,
+    dt: float = DEFAULT_DT,
+    budget_s: float = DEFAULT_BUDGET_S,
+    memory: bool = True,
+    warmup: int = DEFAULT_WARMUP,
+) -> dict:
+    """Benchmark one population size and return its metrics"""
+    profiler = Profiler(enabled=True, window=steps)
+    model = _model(size, seed, dt, profiler)
+    for _ in range(warmup):
+        model.step()
+    profiler.reset()
+
+    start = time.perf_counter()
+    steps_run = 0
+    parked = 0.0
+    while steps_run < steps and time.perf_counter() - start < budget_s:
+        model.step()
+        steps_run += 1
+        parked += len(model.scheduler) / max(len(model.vehicles), 1)
+    elapsed = time.perf_counter() - start
+
+    phases = profiler.percentiles()
+    step_stats = phases.pop("step")
+    result = {
+        "agents": size,
+        "steps": steps_run,
+        "warmup_steps": warmup,
+        "wall_time_s": elapsed,
+        "steps_per_s": steps_run / elapsed if elapsed > 0 else float("inf"),
+        "step_ms": step_stats,
+        "phases_ms": {phase: row["mean"] for phase, row in phases.items()},
+        "vehicles_active": len(model.vehicles),
+        "pedestrians_active": len(model.pedestrians),
+        "vehicles_parked_share": parked / steps_run if steps_run else 0.0,
+    }
+    if memory:
+        # Traced separately because tracemalloc slows the timed run down
+        result["peak_memory_bytes"] = _peak_memory(size, warmup + steps_run, seed, dt)
+    return result
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    sizes=DEFAULT_SIZES,
+    steps: int = DEFAULT_STEPS,
+    seed: int = 1,
+    dt: float = DEFAULT_DT,
+    budget_s: float = DEFAULT_BUDGET_S,
+    memory: bool = True,
+    warmup: int = DEFAULT_WARMUP,
+) -> dict:
+    cases = {}
+    for size in sizes:
+        cases[str(size)] = run_case(size, steps, seed, dt, budget_s, memory, warmup)
+        print_case(cases[str(size)])
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "steps": steps,
+            "warmup": warmup,
+            "seed": seed,
+            "dt": dt,
+        },
+        "cases": cases,
+    }
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD
+) -> list:
+    """Return a message for every case that got slower or bigger than allowed"""
+    regressions = []
+    for size, case in current["cases"].items():
+        before = baseline["cases"].get(size)
+        if before is None:
+            continue
+        speed = case["steps_per_s"] / before["steps_per_s"] - 1.0
+        if speed < -threshold:
+            regressions.append(
+                f"{size} agents: steps/s {before['steps_per_s']:.1f} -> "
+                f"{case['steps_per_s']:.1f} ({speed:+.1%})"
+            )
+        if "peak_memory_bytes" in case and "peak_memory_bytes" in before:
+            growth = case["peak_memory_bytes"] / before["peak_memory_bytes"] - 1.0
+            if growth > threshold:
+                regressions.append(
+                    f"{size} agents: peak memory {before['peak_memory_bytes']} -> "
+                    f"{case['peak_memory_bytes']} bytes ({growth:+.1%})"
+                )
+    return regressions
+
+
+def print_case(case: dict):
+    memory = case.get("peak_memory_bytes")
+    memory_text = f"{memory / 2**20:>9.1f} MiB" if memory is not None else ""
+    print(
+        f"{case['agents']:>6} agents  {case['steps']:>5} steps  "
+        f"{case['steps_per_s']:>10.1f} steps/s  "
+        f"p95 {case['step_ms']['p95']:>9.3f} ms{memory_text}  "
+        f"parked {case.get('vehicles_parked_share', 0.0):>6.1%}"
+    )
+    for phase, mean_ms in case["phases_ms"].items():
+        print(f"        {phase:<20}{mean_ms:>10.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TrafficModel scaling benchmark")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="vehicles and pedestrians per case",
+    )
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS)
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=DEFAULT_WARMUP,
+        help="untimed steps before each case is measured",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dt", type=float, default=DEFAULT_DT)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_BUDGET_S,
+        help="wall-clock seconds per case before stopping early",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory pass"
+    )
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="baseline JSON to check for regressions"
+    )
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        args.sizes,
+        args.steps,
+        args.seed,
+        args.dt,
+        args.budget,
+        not args.no_memory,
+        args.warmup,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
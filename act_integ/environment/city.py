@@ -1,12 +1,23 @@
 # environment.py
 import random
 from OpenGL.GL import *
-from OpenGL.GLU import gluNewQuadric, gluCylinder, gluDisk
-from OpenGL.GLUT import *
+
+from rendering.primitives import primitive_pool
 
 
 class City:
-    def __init__(self):
+    # Static scene layers in draw order, each compiled into one display list
+    LAYERS = (
+        "roads",
+        "sidewalks",
+        "crosswalks",
+        "park",
+        "buildings",
+        "park_bushes",
+        "pool",
+    )
+
+    def __init__(self, seed=None):
         # Building dimensions and spacing
         self.building_width = 20  # X-axis footprint
         self.building_depth = 20  # Z-axis footprint
@@ -51,11 +62,47 @@ class City:
         self.mullion = 0.05
         self.row_height = self.window_height + self.mullion
 
+        # Compiled display list per layer, built lazily on first draw
+        self.layer_lists = {}
+        self.layer_enabled = {name: True for name in self.LAYERS}
+
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Pick new building heights and rebuild the buildings layer"""
+        self.seed = seed
+        rng = random.Random(seed)
+
         # Generate random number of rows and calculate heights
-        self.window_rows = [random.randint(5, 15) for _ in self.building_positions]
+        self.window_rows = [rng.randint(5, 15) for _ in self.building_positions]
         self.building_heights = [
             rows * self.row_height * 30 for rows in self.window_rows
         ]
+        self.invalidate("buildings")
+
+    def toggle_layer(self, name):
+        self.layer_enabled[name] = not self.layer_enabled[name]
+
+    def invalidate(self, name=None):
+        """Free the display list of one layer (or all) so it is recompiled"""
+        names = self.LAYERS if name is None else (name,)
+        for layer in names:
+            gl_list = self.layer_lists.pop(layer, None)
+            if gl_list is not None:
+                glDeleteLists(gl_list, 1)
+
+    def free(self):
+        """Release all compiled layers, e.g. before the GL context is destroyed"""
+        self.invalidate()
+
+    def _compile_layer(self, name):
+        primitive_pool.build()  # Display lists cannot be created while compiling one
+        gl_list = glGenLists(1)
+        glNewList(gl_list, GL_COMPILE)
+        getattr(self, "draw_" + name)()
+        glEndList()
+        self.layer_lists[name] = gl_list
+        return gl_list
 
     def draw_roads(self):
         # Draw base road surfaces
@@ -249,7 +296,7 @@ class City:
                 glPushMatrix()
                 glTranslatef(x, y, 0)
                 glScalef(window_w, window_h, 0.01)
-                glutSolidCube(1)
+                primitive_pool.cube()
                 glPopMatrix()
 
     def draw_buildings(self):
@@ -280,7 +327,7 @@ class City:
             glScalef(self.building_width, height, self.building_depth)
 
             # Draw base cube representing the building
-            glutSolidCube(1)
+            primitive_pool.cube()
 
             # Draw window details on multiple faces
             glDisable(GL_LIGHTING)
@@ -331,11 +378,10 @@ class City:
         glTranslatef(x, y, z)
         glRotatef(-90, 1, 0, 0)
         glColor3f(0.55, 0.27, 0.07)
-        quad = gluNewQuadric()
-        gluCylinder(quad, 1.0, 1.0, 10.0, 12, 3)
+        primitive_pool.cylinder(1.0, 10.0)
         glTranslatef(0, 0, 10.0)
         glColor3f(0.0, 0.8, 0.0)
-        glutSolidSphere(3.0, 12, 12)
+        primitive_pool.sphere(3.0)
         glPopMatrix()
 
     def draw_park(self):
@@ -382,7 +428,7 @@ class City:
         while x <= x_max:
             glPushMatrix()
             glTranslatef(x, 1.0, z_bottom)
-            glutSolidSphere(bush_radius, 16, 16)
+            primitive_pool.sphere(bush_radius)
             glPopMatrix()
             x += spacing
 
@@ -391,7 +437,7 @@ class City:
         while x <= x_max:
             glPushMatrix()
             glTranslatef(x, 1.0, z_top)
-            glutSolidSphere(bush_radius, 16, 16)
+            primitive_pool.sphere(bush_radius)
             glPopMatrix()
             x += spacing
 
@@ -400,7 +446,7 @@ class City:
         while z <= z_top - spacing:
             glPushMatrix()
             glTranslatef(x_min, 1.0, z)
-            glutSolidSphere(bush_radius, 16, 16)
+            primitive_pool.sphere(bush_radius)
             glPopMatrix()
             z += spacing
 
@@ -409,7 +455,7 @@ class City:
         while z <= z_top - spacing:
             glPushMatrix()
             glTranslatef(x_max, 1.0, z)
-            glutSolidSphere(bush_radius, 16, 16)
+            primitive_pool.sphere(bush_radius)
             glPopMatrix()
             z += spacing
 
@@ -419,8 +465,7 @@ class City:
         # Colocar la alberca en una posición adecuada, por ejemplo, en el centro del parque
         glTranslatef(0, 0.001, 100)
         glColor3f(0.0, 0.5, 1.0)  # Azul para el agua
-        quadric = gluNewQuadric()
-        gluDisk(quadric, 0.0, 15.0, 32, 1)
+        primitive_pool.disk(15.0)
         glPopMatrix()
 
     def draw_crosswalks(self):
@@ -500,10 +545,11 @@ class City:
             draw_crosswalk_stripes(pos["x"], pos["z"], pos["horizontal"])
 
     def draw(self):
-        self.draw_roads()
-        self.draw_sidewalks()
-        self.draw_crosswalks()  # Add crosswalks
-        self.draw_park()
-        self.draw_buildings()
-        self.draw_park_bushes()  # Ahora los arbustos se colocan en el perímetro reducido
-        self.draw_pool()
+        """Draw the static scene with one display list call per layer"""
+        for name in self.LAYERS:
+            if not self.layer_enabled[name]:
+                continue
+            gl_list = self.layer_lists.get(name)
+            if gl_list is None:
+                gl_list = self._compile_layer(name)
+            glCallList(gl_list)
@@ -0,0 +1,181 @@
+# environment/road_network.py
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import networkx as nx
+
+# Driving lanes of the roads drawn by City.draw_roads, from entry to exit.
+# The horizontal road spans z -20..20, the vertical ones x -90..-50 and
+# 50..90; each carries one lane per direction.
+LANES = {
+    "left_N": ((-57.0, -135.0), (-57.0, 135.0)),
+    "left_S": ((-83.0, 135.0), (-83.0, -135.0)),
+    "right_N": ((77.0, -135.0), (77.0, 135.0)),
+    "right_S": ((63.0, 135.0), (63.0, -135.0)),
+    "main_E": ((-140.0, 5.0), (140.0, 5.0)),
+    "main_W": ((140.0, -10.0), (-140.0, -10.0)),
+}
+
+# Intersection boxes (x_min, x_max, z_min, z_max) where lanes may turn
+INTERSECTIONS = {
+    "left": (-90.0, -50.0, -20.0, 20.0),
+    "right": (50.0, 90.0, -20.0, 20.0),
+}
+
+# Extra cost of a turn in distance units, so straight routes win ties
+TURN_PENALTY = 10.0
+
+Point = Tuple[float, float]
+
+
+def _road(lane: str) -> str:
+    return lane.split("_")[0]
+
+
+def _progress(segment, point: Point) -> float:
+    (x0, z0), _ = segment
+    return abs(point[0] - x0) + abs(point[1] - z0)
+
+
+def _crossing(a, b):
+    """Point where two perpendicular lane segments cross, or None"""
+    (ax0, az0), (ax1, az1) = a
+    (bx0, bz0), (bx1, bz1) = b
+    if ax0 == ax1 and bz0 == bz1:
+        x, z = ax0, bz0
+    elif az0 == az1 and bx0 == bx1:
+        x, z = bx0, az0
+    else:
+        return None
+    if not (
+        min(ax0, ax1) <= x <= max(ax0, ax1) and min(az0, az1) <= z <= max(az0, az1)
+    ):
+        return None
+    if not (
+        min(bx0, bx1) <= x <= max(bx0, bx1) and min(bz0, bz1) <= z <= max(bz0, bz1)
+    ):
+        return None
+    return x, z
+
+
+def _box_edges(segment, box) -> List[Point]:
+    """Points where a lane segment enters and leaves an intersection box"""
+    (x0, z0), (x1, z1) = segment
+    x_min, x_max, z_min, z_max = box
+    if x0 == x1 and x_min <= x0 <= x_max:
+        return [(x0, z_min), (x0, z_max)]
+    if z0 == z1 and z_min <= z0 <= z_max:
+        return [(x_min, z0), (x_max, z0)]
+    return []
+
+
+def _collinear(a: Point, b: Point, c: Point) -> bool:
+    return (b[0] - a[0]) * (c[1] - b[1]) == (b[1] - a[1]) * (c[0] - b[0])
+
+
+class RoadNetwork:
+    """Directed lane graph of the city with every entry-to-exit route cached.
+
+    Nodes are ``(lane, x, z)`` points: lane ends, intersection box edges
+    and the spots where two lanes cross. Lane edges follow the direction
+    of travel; turn connectors link the two lanes at each crossing. All
+    routes are solved once on construction, so picking one at spawn is a
+    dictionary lookup.
+    """
+
+    def __init__(self, lanes=LANES, intersections=INTERSECTIONS):
+        self.lanes = dict(lanes)
+        self.intersections = dict(intersections)
+        self.graph = nx.DiGraph()
+        self.entries: Dict[str, Point] = {}
+        self.exits: Dict[str, Point] = {}
+        self._build(intersections)
+        self.routes = self._solve_routes()
+        self.destinations = {
+            origin: [exit for o, exit in self.routes if o == origin]
+            for origin in self.entries
+        }
+
+    def _build(self, intersections):
+        graph = self.graph
+        for lane, segment in self.lanes.items():
+            start, end = segment
+            points = {start, end}
+            for box in intersections.values():
+                points.update(_box_edges(segment, box))
+            for other, other_segment in self.lanes.items():
+                crossing = _crossing(segment, other_segment)
+                if other != lane and crossing is not None:
+                    points.add(crossing)
+
+            ordered = sorted(points, key=lambda point: _progress(segment, point))
+            for point in ordered:
+                graph.add_node((lane, *point), lane=lane, pos=point)
+            for a, b in zip(ordered, ordered[1:]):
+                length = _progress(segment, b) - _progress(segment, a)
+                graph.add_edge(
+                    (lane, *a), (lane, *b), kind="lane", length=length, cost=length
+                )
+            self.entries[lane] = start
+            self.exits[lane] = end
+
+        # Turn connectors between lanes that cross inside an intersection
+        for a in self.lanes:
+            for b in self.lanes:
+                crossing = _crossing(self.lanes[a], self.lanes[b]) if a != b else None
+                if crossing is None or not any(
+                    box[0] <= crossing[0] <= box[1] and box[2] <= crossing[1] <= box[3]
+                    for box in intersections.values()
+                ):
+                    continue
+                graph.add_edge(
+                    (a, *crossing),
+                    (b, *crossing),
+                    kind="turn",
+                    length=0.0,
+                    cost=TURN_PENALTY,
+                )
+
+    def _solve_routes(self) -> Dict[Tuple[str, str], tuple]:
+        routes = {}
+        for origin, start in self.entries.items():
+            paths = nx.single_source_dijkstra_path(
+                self.graph, (origin, *start), weight="cost"
+            )
+            for exit, end in self.exits.items():
+                # The other lane of the same road would need a U-turn
+                if exit != origin and _road(exit) == _road(origin):
+                    continue
+                path = paths.get((exit, *end))
+                if path is not None:
+                    routes[origin, exit] = self._waypoints(path)
+        return routes
+
+    def _waypoints(self, path) -> tuple:
+        """Corner points of a node path as (x, 0, z), without the start"""
+        points = []
+        for node in path:
+            point = self.graph.nodes[node]["pos"]
+            if points and points[-1] == point:
+                continue
+            if len(points) >= 2 and _collinear(points[-2], points[-1], point):
+                points[-1] = point
+            else:
+                points.append(point)
+        return tuple((float(x), 0.0, float(z)) for x, z in points[1:])
+
+    def route(self, origin: str, destination: str) -> tuple:
+        """Waypoints from an entry lane to an exit lane"""
+        return self.routes[origin, destination]
+
+    def entry_heading(self, origin: str) -> Point:
+        """Unit direction of travel at an entry"""
+        (x0, z0), (x1, z1) = self.lanes[origin]
+        length = abs(x1 - x0) + abs(z1 - z0)
+        return (x1 - x0) / length, (z1 - z0) / length
+
+
+@lru_cache(maxsize=None)
+def city_road_network() -> RoadNetwork:
+    """The road network of the city layout, built once per process"""
+    return RoadNetwork()
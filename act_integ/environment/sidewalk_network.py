@@ -0,0 +1,226 @@
+# environment/sidewalk_network.py
+import math
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import networkx as nx
+
+Point = Tuple[float, float]
+
+# Rectangles (x1, z1, x2, z2) as drawn by City.draw_sidewalks, 5 units wide
+SIDEWALK_WIDTH = 5.0
+SIDEWALKS = [
+    (-150.0, 20.0, 150.0, 25.0),  # Horizontal road, north side
+    (-150.0, -25.0, 150.0, -20.0),  # Horizontal road, south side
+    (-95.0, -150.0, -90.0, 150.0),  # Left vertical road, west side
+    (-50.0, -150.0, -45.0, 150.0),  # Left vertical road, east side
+    (45.0, -150.0, 50.0, 150.0),  # Right vertical road, west side
+    (90.0, -150.0, 95.0, 150.0),  # Right vertical road, east side
+]
+
+# Road surfaces from City.draw_roads; sidewalk stretches over them are
+# only walkable as crosswalks
+ROADS = [
+    (-150.0, -20.0, 150.0, 20.0),
+    (-90.0, -150.0, -50.0, 150.0),
+    (50.0, -150.0, 90.0, 150.0),
+]
+
+# Crosswalk backgrounds from City.draw_roads
+CROSSWALKS = [
+    (-90.0, 20.0, -50.0, 25.0),  # Left intersection, north
+    (-90.0, -25.0, -50.0, -20.0),  # Left intersection, south
+    (-90.0, -20.0, -85.0, 20.0),  # Left intersection, west
+    (-55.0, -20.0, -50.0, 20.0),  # Left intersection, east
+    (50.0, 20.0, 90.0, 25.0),  # Right intersection, north
+    (50.0, -25.0, 90.0, -20.0),  # Right intersection, south
+    (50.0, -20.0, 55.0, 20.0),  # Right intersection, west
+    (85.0, -20.0, 90.0, 20.0),  # Right intersection, east
+]
+
+# Extra cost of using a crosswalk in distance units, so routes avoid
+# crossing roads they do not need to cross
+CROSSING_PENALTY = 10.0
+
+# Route cache: origins and destinations are snapped to this grid
+ROUTE_QUANTUM = 5.0
+ROUTE_CACHE_SIZE = 1024
+
+
+def _centre_line(rect) -> Tuple[Point, Point]:
+    """Segment along the long axis of a rectangle"""
+    x1, z1, x2, z2 = rect
+    if x2 - x1 >= z2 - z1:
+        z = (z1 + z2) / 2
+        return (x1, z), (x2, z)
+    x = (x1 + x2) / 2
+    return (x, z1), (x, z2)
+
+
+def _inside(point: Point, rect) -> bool:
+    x1, z1, x2, z2 = rect
+    return x1 < point[0] < x2 and z1 < point[1] < z2
+
+
+def _distance(a: Point, b: Point) -> float:
+    return math.hypot(b[0] - a[0], b[1] - a[1])
+
+
+def _collinear(a: Point, b: Point, c: Point) -> bool:
+    return (b[0] - a[0]) * (c[1] - b[1]) == (b[1] - a[1]) * (c[0] - b[0])
+
+
+def _map_edge(point: Point, extent: float) -> str:
+    """Name of the map edge a sidewalk end lies on"""
+    x, z = point
+    if abs(z) >= extent:
+        return "N" if z > 0 else "S"
+    return "E" if x > 0 else "W"
+
+
+class SidewalkNetwork:
+    """Walkable graph of sidewalks and crosswalks with memoized A* routes.
+
+    Sidewalk centre lines are split where they meet, and their stretches
+    over a road are dropped; crosswalks bridge the roads instead, joined
+    to the nearest sidewalk corner. Routes between quantized origins and
+    destinations are kept in an LRU cache, so pedestrians spawning near
+    each other share one A* search.
+    """
+
+    def __init__(self, sidewalks=SIDEWALKS, crosswalks=CROSSWALKS, roads=ROADS):
+        self.graph = nx.Graph()
+        self.extent = max(
+            max(abs(x1), abs(z1), abs(x2), abs(z2)) for x1, z1, x2, z2 in sidewalks
+        )
+        self._add_sidewalks(sidewalks, roads)
+        self._add_crosswalks(crosswalks)
+        self.ends: Dict[str, List[Point]] = {}
+        for node, degree in self.graph.degree():
+            if degree == 1 and max(abs(node[0]), abs(node[1])) >= self.extent:
+                self.ends.setdefault(_map_edge(node, self.extent), []).append(node)
+        self._route = lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._solve)
+
+    def _add_sidewalks(self, sidewalks, roads):
+        lines = [_centre_line(rect) for rect in sidewalks]
+        for start, end in lines:
+            # Split at every point where another centre line crosses this one
+            points = {start, end}
+            for other_start, other_end in lines:
+                for x, z in ((other_start[0], start[1]), (start[0], other_start[1])):
+                    on_self = min(start[0], end[0]) <= x <= max(start[0], end[0])
+                    on_self &= min(start[1], end[1]) <= z <= max(start[1], end[1])
+                    on_other = min(other_start[0], other_end[0]) <= x
+                    on_other &= x <= max(other_start[0], other_end[0])
+                    on_other &= min(other_start[1], other_end[1]) <= z
+                    on_other &= z <= max(other_start[1], other_end[1])
+                    if on_self and on_other:
+                        points.add((x, z))
+
+            ordered = sorted(points, key=lambda point: _distance(start, point))
+            for a, b in zip(ordered, ordered[1:]):
+                middle = ((a[0] + b[0]) / 2, (a[1] + b[1]) / 2)
+                if any(_inside(middle, road) for road in roads):
+                    continue
+                length = _distance(a, b)
+                self.graph.add_edge(a, b, kind="sidewalk", length=length, cost=length)
+
+    def _add_crosswalks(self, crosswalks):
+        corners = list(self.graph.nodes)
+        for rect in crosswalks:
+            start, end = _centre_line(rect)
+            # Reach out to the middle of the sidewalks on either side
+            if start[0] == end[0]:
+                start = (start[0], start[1] - SIDEWALK_WIDTH / 2)
+                end = (end[0], end[1] + SIDEWALK_WIDTH / 2)
+            else:
+                start = (start[0] - SIDEWALK_WIDTH / 2, start[1])
+                end = (end[0] + SIDEWALK_WIDTH / 2, end[1])
+            length = _distance(start, end)
+            self.graph.add_edge(
+                start,
+                end,
+                kind="crosswalk",
+                length=length,
+                cost=length + CROSSING_PENALTY,
+            )
+            for point in (start, end):
+                corner = min(corners, key=lambda node: _distance(node, point))
+                if corner != point:
+                    length = _distance(corner, point)
+                    self.graph.add_edge(
+                        corner, point, kind="sidewalk", length=length, cost=length
+                    )
+
+    def _attach(self, point: Point):
+        """Closest point on any sidewalk edge, with that edge's endpoints"""
+        best = None
+        for a, b, kind in self.graph.edges(data="kind"):
+            if kind != "sidewalk":
+                continue
+            dx, dz = b[0] - a[0], b[1] - a[1]
+            t = ((point[0] - a[0]) * dx + (point[1] - a[1]) * dz) / (dx * dx + dz * dz)
+            t = min(max(t, 0.0), 1.0)
+            foot = (a[0] + t * dx, a[1] + t * dz)
+            distance = _distance(foot, point)
+            if best is None or distance < best[0]:
+                best = (distance, foot, (a, b))
+        return best[1], best[2]
+
+    def _solve(self, origin: Point, destination: Point) -> tuple:
+        start, starts = self._attach(origin)
+        goal, goals = self._attach(destination)
+        if set(starts) == set(goals):
+            return tuple((float(x), 0.0, float(z)) for x, z in (start, goal))
+        best = None
+        for a in starts:
+            for b in goals:
+                cost = _distance(start, a) + _distance(b, goal)
+                cost += nx.astar_path_length(
+                    self.graph, a, b, heuristic=_distance, weight="cost"
+                )
+                if best is None or cost < best[0]:
+                    best = (cost, a, b)
+        _, a, b = best
+        path = nx.astar_path(self.graph, a, b, heuristic=_distance, weight="cost")
+
+        points = [start]
+        for point in path + [goal]:
+            if point == points[-1]:
+                continue
+            # Drop corners the walk passes straight through
+            if len(points) >= 2 and _collinear(points[-2], points[-1], point):
+                points[-1] = point
+            else:
+                points.append(point)
+        return tuple((float(x), 0.0, float(z)) for x, z in points)
+
+    def route(self, origin: Point, destination: Point) -> tuple:
+        """Waypoints along sidewalks and crosswalks from near `origin` to
+        near `destination`, cached by their position on a coarse grid"""
+        return self._route(self._quantize(origin), self._quantize(destination))
+
+    @staticmethod
+    def _quantize(point: Point) -> Point:
+        return (
+            round(point[0] / ROUTE_QUANTUM) * ROUTE_QUANTUM,
+            round(point[1] / ROUTE_QUANTUM) * ROUTE_QUANTUM,
+        )
+
+    def destinations(self, origin: Point) -> List[Point]:
+        """Sidewalk ends on other map edges than the one nearest `origin`"""
+        x, z = origin
+        if abs(z) >= abs(x):
+            edge = "N" if z > 0 else "S"
+        else:
+            edge = "E" if x > 0 else "W"
+        return [end for side, ends in self.ends.items() if side != edge for end in ends]
+
+    def cache_info(self):
+        return self._route.cache_info()
+
+
+@lru_cache(maxsize=None)
+def city_sidewalk_network() -> SidewalkNetwork:
+    """The sidewalk network of the city layout, built once per process"""
+    return SidewalkNetwork()
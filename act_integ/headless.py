@@ -0,0 +1,139 @@
+"""Run the traffic simulation without OpenGL or pygame.
+
+Steps the model as fast as possible and prints timing and KPI summaries,
+which makes it usable on render-less batch nodes:
+
+    python headless.py --steps 5000 --seed 42
+
+Add --record DIR to keep per-agent trajectories for later analysis.
+"""
+
+import argparse
+import time
+from typing import Optional
+
+from models.clock import DEFAULT_DT
+from models.profiler import Profiler
+from models.recorder import TrajectoryRecorder
+from models.traffic_model import TrafficModel
+
+
+def run_headless(
+    steps: int,
+    seed: Optional[int] = None,
+    dt: float = DEFAULT_DT,
+    profile: bool = False,
+    trace_path: Optional[str] = None,
+    recorder: Optional[TrajectoryRecorder] = None,
+) -> dict:
+    """Run the model for a number of steps and return timing and KPIs
+
+    With profile set, per-phase step percentiles are added under "phases"
+    and trace_path (if given) receives a Chrome trace of every phase. A
+    recorder is closed at the end of the run and its stats are added
+    under "recording".
+    """
+    parameters = {"dt": dt}
+    if seed is not None:
+        parameters["seed"] = seed
+
+    profiler = Profiler(enabled=profile or bool(trace_path))
+    model = TrafficModel(profiler=profiler, recorder=recorder, parameters=parameters)
+    step_times = []
+
+    start = time.perf_counter()
+    try:
+        for _ in range(steps):
+            step_start = time.perf_counter()
+            model.step()
+            step_times.append(time.perf_counter() - step_start)
+    finally:
+        # Keep what was recorded readable even if the run is interrupted
+        if recorder is not None:
+            recorder.close()
+    elapsed = time.perf_counter() - start
+
+    step_times.sort()
+    timing = {
+        "wall_time_s": elapsed,
+        "steps_per_s": steps / elapsed if elapsed > 0 else float("inf"),
+        "mean_step_ms": 1000 * elapsed / steps if steps else 0.0,
+        "p95_step_ms": (
+            1000 * step_times[int(0.95 * (len(step_times) - 1))] if step_times else 0.0
+        ),
+        "max_step_ms": 1000 * step_times[-1] if step_times else 0.0,
+    }
+    summary = {"timing": timing, "kpis": model.summary()}
+    if profiler.enabled:
+        summary["phases"] = profiler.percentiles()
+        if trace_path:
+            profiler.export_trace(trace_path)
+    if recorder is not None:
+        summary["recording"] = recorder.stats()
+    return summary
+
+
+def print_summary(summary: dict):
+    print("Timing")
+    for key, value in summary["timing"].items():
+        print(f"  {key:<24}{value:>12.3f}")
+    print("KPIs")
+    for key, value in summary["kpis"].items():
+        if isinstance(value, float):
+            print(f"  {key:<24}{value:>12.3f}")
+        else:
+            print(f"  {key:<24}{value:>12}")
+    if "phases" in summary:
+        print(f"Phases (ms){'p50':>25}{'p95':>10}{'p99':>10}")
+        for phase, row in summary["phases"].items():
+            print(
+                f"  {phase:<24}{row['p50']:>10.3f}{row['p95']:>10.3f}{row['p99']:>10.3f}"
+            )
+    if "recording" in summary:
+        print("Recording")
+        for key, value in summary["recording"].items():
+            if isinstance(value, float):
+                print(f"  {key:<24}{value:>12.3f}")
+            else:
+                print(f"  {key:<24}{value:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless traffic simulation")
+    parser.add_argument("--steps", type=int, default=1000, help="steps to run")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument(
+        "--dt", type=float, default=DEFAULT_DT, help="simulated seconds per step"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="report per-phase step timings"
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH", help="write a Chrome trace of the profiled phases"
+    )
+    parser.add_argument(
+        "--record", metavar="DIR", help="write agent trajectories to a directory"
+    )
+    parser.add_argument(
+        "--record-every", type=int, default=10, help="steps between trajectory samples"
+    )
+    parser.add_argument(
+        "--record-format",
+        choices=("npz", "parquet"),
+        default="npz",
+        help="trajectory chunk format (parquet needs pyarrow)",
+    )
+    args = parser.parse_args(argv)
+
+    recorder = None
+    if args.record:
+        recorder = TrajectoryRecorder(
+            args.record, every=args.record_every, format=args.record_format
+        )
+    print_summary(
+        run_headless(args.steps, args.seed, args.dt, args.profile, args.trace, recorder)
+    )
+
+
+if __name__ == "__main__":
+    main()
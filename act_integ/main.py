@@ -1,3 +1,4 @@
+import argparse
 import os
 import time
 import random
@@ -8,21 +9,66 @@ from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
+from models.clock import DEFAULT_DT
+from models.profiler import Profiler
+from models.replay import ReplayPlayer, Trajectory
+from models.simulation_thread import SimulationThread
+from models.snapshot import SnapshotBuffer, interpolate, take_snapshot
 from models.traffic_model import TrafficModel
 from environment.city import City
 from objects.traffic_light import TrafficLight
+from rendering.capture import (
+    AsyncFrameReader,
+    FrameEncoder,
+    OffscreenTarget,
+    create_headless_context,
+    offscreen_supported,
+)
+from rendering.hud import ProfilerHUD
+from rendering.primitives import primitive_pool
+from rendering.scene import TrafficRenderer
+from rendering.signals import draw_traffic_light
 
 # Constants
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 TARGET_FPS = 60
+SIM_DT = DEFAULT_DT  # Simulated seconds per model step
+SIM_SPEED = 1.0  # Simulated seconds per real second, independent of TARGET_FPS
+MAX_CATCH_UP_STEPS = 5  # Avoid a spiral of death after a slow step
+RECORD_FPS = 30  # Frame rate of recorded videos
+REPLAY_SCRUB = 5.0  # Simulated seconds per arrow key press, x6 with shift
 
 
 class TrafficSimulation:
-    def __init__(self):
+    def __init__(
+        self,
+        profile: bool = False,
+        trace_path: Optional[str] = None,
+        record: Optional[str] = None,
+        offscreen: bool = False,
+        replay: Optional[str] = None,
+    ):
         self.city: Optional[City] = None
         self.model: Optional[TrafficModel] = None
+        self.renderer: Optional[TrafficRenderer] = None
+        self.snapshots = SnapshotBuffer()
+        self.sim_thread: Optional[SimulationThread] = None
+        # Shared by the model and the render loop; F3 toggles it at runtime
+        self.profiler = Profiler(enabled=profile)
+        self.hud = ProfilerHUD(self.profiler)
+        self.trace_path = trace_path
+        # Frame capture: numbered PNGs in a directory or an .mp4 file
+        self.record = record
+        self.offscreen = offscreen
+        self.target: Optional[OffscreenTarget] = None
+        self.reader: Optional[AsyncFrameReader] = None
+        self.encoder: Optional[FrameEncoder] = None
+        self._context = None  # Keeps a windowless GL context alive
         self.traffic_lights: List[TrafficLight] = []
+        # Trajectory directory to play back instead of running the model
+        self.replay = replay
+        self.player: Optional[ReplayPlayer] = None
 
     def _init_opengl(self):
         """Initialize OpenGL settings"""
@@ -72,19 +118,109 @@ class TrafficSimulation:
             tl.controls_direction = direction
             self.traffic_lights.append(tl)
 
-    def display(self):
-        """Render the scene"""
+    def _frame_snapshot(self):
+        """Blend the two latest snapshots, drawing one publish interval behind"""
+        previous, latest = self.snapshots.pair()
+        if previous is None or latest is None:
+            return latest
+        interval = latest.published_at - previous.published_at
+        if interval <= 0:
+            return latest
+        alpha = (time.perf_counter() - latest.published_at) / interval
+        return interpolate(previous, latest, alpha)
+
+    def display(self, snapshot=None):
+        """Render the scene, by default from the latest interpolated snapshot"""
+        profiler = self.profiler
+        profiler.start()
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
         gluLookAt(0.0, 200.0, 250.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
 
         self.city.draw()
-        self.model.draw()
+        profiler.lap("city_draw")
+        if snapshot is None and self.player is not None:
+            snapshot = self.player.snapshot()
+        elif snapshot is None:
+            snapshot = self._frame_snapshot()
+        profiler.lap("interpolate")
+        if snapshot is not None:
+            self.renderer.draw(snapshot)
 
         for tl in self.traffic_lights:
-            tl.draw()
+            draw_traffic_light(tl)
+        profiler.lap("agent_draw")
+
+        if profiler.enabled:
+            self.hud.draw(WINDOW_HEIGHT)
+            profiler.lap("hud")
+
+        if self.reader is not None:
+            frame = self.reader.read()
+            if frame is not None:
+                self.encoder.submit(frame)
+            profiler.lap("capture")
+
+        if not self.offscreen:
+            pygame.display.flip()
+            profiler.lap("flip")
+        profiler.finish("frame")
+
+    def _start_capture(self):
+        if (self.offscreen or self.record) and not offscreen_supported():
+            raise RuntimeError(
+                "The OpenGL context lacks framebuffer or pixel buffer objects"
+            )
+        if self.offscreen:
+            self.target = OffscreenTarget(WINDOW_WIDTH, WINDOW_HEIGHT)
+            self.target.bind()
+        if self.record:
+            self.reader = AsyncFrameReader(WINDOW_WIDTH, WINDOW_HEIGHT)
+            self.encoder = FrameEncoder(
+                self.record, WINDOW_WIDTH, WINDOW_HEIGHT, fps=RECORD_FPS
+            )
+
+    def _stop_capture(self):
+        """Finish the recording; a failed encoder raises after cleanup"""
+        try:
+            if self.reader is not None:
+                for frame in self.reader.flush():
+                    self.encoder.submit(frame)
+        finally:
+            if self.reader is not None:
+                self.reader.free()
+            if self.target is not None:
+                self.target.unbind()
+                self.target.free()
+            if self.encoder is not None:
+                self.encoder.close()
+
+    def run_offscreen(self, frames: int):
+        """Render a fixed number of frames without a window, e.g. for videos
+
+        The model is stepped in lockstep with the frames, so recordings
+        cover the same simulated time however slow the machine is.
+        """
+        self._context = create_headless_context(WINDOW_WIDTH, WINDOW_HEIGHT)
+        try:
+            self._setup_scene()
+            self._start_capture()
 
-        pygame.display.flip()
+            steps_per_frame = max(1, round(1.0 / (RECORD_FPS * SIM_DT)))
+            for _ in range(frames):
+                if self.player is not None:
+                    self.player.advance(1.0 / RECORD_FPS)
+                    self.display(self.player.snapshot())
+                    continue
+                for _ in range(steps_per_frame):
+                    self.model.step()
+                self.display(take_snapshot(self.model))
+        finally:
+            try:
+                self._stop_capture()
+                self._shutdown()
+            finally:
+                pygame.quit()
 
     def run(self):
         """Main simulation loop"""
@@ -93,19 +229,84 @@ class TrafficSimulation:
             (WINDOW_WIDTH, WINDOW_HEIGHT), pygame.DOUBLEBUF | pygame.OPENGL
         )
         pygame.display.set_caption("Traffic Simulation - Organized City")
+        self._setup_scene()
+        self._start_capture()
 
+        # The model steps on its own thread; this loop only draws snapshots
+        if self.player is None:
+            self.sim_thread = SimulationThread(
+                self.model,
+                self.snapshots,
+                speed=SIM_SPEED,
+                max_catch_up=MAX_CATCH_UP_STEPS,
+            )
+            self.sim_thread.start()
+        try:
+            self._loop()
+        finally:
+            if self.sim_thread is not None:
+                self.sim_thread.stop()
+            try:
+                self._stop_capture()
+                self._shutdown()
+            finally:
+                pygame.quit()
+
+    def _setup_scene(self):
         self._init_opengl()
 
         # Initialize simulation components
         self.city = City()
         self._create_traffic_lights()
-        self.model = TrafficModel(traffic_lights=self.traffic_lights)
+        self.model = TrafficModel(
+            traffic_lights=self.traffic_lights,
+            profiler=self.profiler,
+            parameters={"dt": SIM_DT},
+        )
+        self.renderer = TrafficRenderer(self.model)
+        if self.replay:
+            # The idle model only supplies light and stop block geometry
+            self.player = ReplayPlayer(
+                Trajectory(self.replay), self.model.stop_blocks, speed=SIM_SPEED
+            )
 
+    def _handle_replay_key(self, event):
+        """Space pauses, arrows scrub and change speed, Home/End jump"""
+        player = self.player
+        scrub = REPLAY_SCRUB * (6 if event.mod & pygame.KMOD_SHIFT else 1)
+        if event.key == pygame.K_SPACE:
+            player.toggle_pause()
+        elif event.key == pygame.K_RIGHT:
+            player.scrub(scrub)
+        elif event.key == pygame.K_LEFT:
+            player.scrub(-scrub)
+        elif event.key == pygame.K_UP:
+            player.faster()
+        elif event.key == pygame.K_DOWN:
+            player.slower()
+        elif event.key == pygame.K_HOME:
+            player.seek(0.0)
+        elif event.key == pygame.K_END:
+            player.seek(player.trajectory.duration)
+
+    def _replay_caption(self) -> str:
+        player = self.player
+        state = "paused" if player.paused else f"x{player.speed:g}"
+        return (
+            f"Traffic Replay - {player.time:7.1f} / "
+            f"{player.trajectory.duration:.1f} s ({state})"
+        )
+
+    def _loop(self):
         running = True
         last_spawn_time = time.time()
+        last_frame = time.perf_counter()
+        caption = None
 
         while running:
             start_time = time.time()
+            if self.sim_thread is not None:
+                self.sim_thread.check()  # Stop drawing a model that died
 
             # Handle events
             for event in pygame.event.get():
@@ -114,25 +315,88 @@ class TrafficSimulation:
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
+                    elif pygame.K_1 <= event.key < pygame.K_1 + len(City.LAYERS):
+                        # Number keys toggle the static city layers
+                        self.city.toggle_layer(City.LAYERS[event.key - pygame.K_1])
+                    elif event.key == pygame.K_F3:
+                        self.profiler.enabled = not self.profiler.enabled
+                    elif self.player is not None:
+                        self._handle_replay_key(event)
+
+            if self.player is not None:
+                now = time.perf_counter()
+                self.player.advance(now - last_frame)
+                last_frame = now
+                title = self._replay_caption()
+                if title != caption:
+                    caption = title
+                    pygame.display.set_caption(caption)
 
             # Spawn vehicles periodically
             if time.time() - last_spawn_time >= (2 + random.random() * 3):
                 last_spawn_time = time.time()
 
-            # Update simulation
-            self.model.step()
             self.display()
 
             # Control frame rate
             elapsed_time = time.time() - start_time
             time.sleep(max(1 / TARGET_FPS - elapsed_time, 0))
 
-        pygame.quit()
+    def _shutdown(self):
+        if self.trace_path:
+            self.profiler.export_trace(self.trace_path)
+        if self.renderer is None:  # The scene was never set up
+            return
+        self.renderer.free()
+        self.city.free()
+        primitive_pool.free()
+
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traffic simulation with OpenGL")
+    parser.add_argument(
+        "--profile", action="store_true", help="start with the profiler HUD on (F3)"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write a Chrome trace of profiled phases on exit",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="OUTPUT",
+        help="capture frames to a directory of PNGs or an .mp4 file",
+    )
+    parser.add_argument(
+        "--offscreen",
+        action="store_true",
+        help="render without a window (set PYOPENGL_PLATFORM=osmesa or egl "
+        "for CPU-only machines); requires --record",
+    )
+    parser.add_argument(
+        "--frames", type=int, default=300, help="frames to render offscreen"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="play back a trajectory written by headless.py --record "
+        "(space pauses, arrows scrub and change speed)",
+    )
+    args = parser.parse_args(argv)
+    if args.offscreen and not args.record:
+        parser.error("--offscreen needs --record")
 
-def main():
-    simulation = TrafficSimulation()
-    simulation.run()
+    simulation = TrafficSimulation(
+        profile=args.profile or bool(args.trace),
+        trace_path=args.trace,
+        record=args.record,
+        offscreen=args.offscreen,
+        replay=args.replay,
+    )
+    if args.offscreen:
+        simulation.run_offscreen(args.frames)
+    else:
+        simulation.run()
 
 
 if __name__ == "__main__":
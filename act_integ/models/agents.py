@@ -1,235 +1,238 @@
 # models/agents.py
-import os
-import random
-from typing import List, Tuple
+import math
 
 import agentpy as ap
-from OpenGL.GL import *
 
+from models.state import StateView
 from models.vehicles import Vehicle
-from objects.objloader import OBJ
 
+# Room left between the front of a vehicle waiting to enter an intersection
+# and its edge; one closer than this has committed to crossing. Corners lie
+# 7 units inside the boxes, so waiting vehicles stay a length from them.
+BOX_MARGIN = 1.0
 
-class VehicleAgent(ap.Agent):
-    def setup(self):
-        """Initialize agent attributes during creation"""
+
+class VehicleAgent(StateView, ap.Agent):
+    def setup(self, entry=None, destination=None):
+        """Initialize agent attributes during creation
+
+        `entry` and `destination` are entry and exit lanes of the road
+        network; either is drawn at random when not given.
+        """
+        # Position, speed, path and flags live in the model's state store
+        self._bind_state(self.model.vehicle_state)
         self.vehicle = Vehicle.AUTO
-        self.speed = 0.5
+        self.speed = 30.0  # Units per simulated second
         self.position = [0.0, 0.0, 0.0]
         self.direction = "N"  # N, S, E, W
-        self.lane = 0  # 0 for right lane, 1 for left lane
+        self.origin = None  # Entry lane in the road network
+        self.destination = None  # Exit lane in the road network
         self.path = []
         self.waiting_at_light = False
-        self.crossing_intersection = False  # New flag
-        self.model = None
         self.scale = 4.0
         self.rotation = 0.0
-        self.assigned_light = None  # Track specific traffic light
         self.length = 15.0  # Vehicle length for collision detection
         self.safe_distance = 30.0  # Minimum safe distance between vehicles
         self.width = 8.0  # Added width parameter
+        self.heading = (0.0, 0.0)  # Unit vector towards the current waypoint
 
-        # Load vehicle model
-        self.load_vehicle_model()
-        self.assign_spawn_point()
+        self.assign_spawn_point(entry, destination)
         self.calculate_path()
 
-    def load_vehicle_model(self):
-        """Load 3D model for the vehicle."""
-        model_path = os.path.join(
-            os.path.dirname(__file__), "..", "assets", "models", "Car.obj"
-        )
-        self.model = OBJ(model_path, swapyz=True)
-        self.model.generate()
-
-    def assign_spawn_point(self):
-        """Assign a random spawn location and initial direction."""
-        spawn_points = {
-            "N": {"pos": [-57, 0, -135], "rot": 180},  # Facing South
-            "S": {"pos": [63, 0, 135], "rot": 0},  # Facing North
-            "E": {"pos": [140, 0, -10], "rot": 90},  # Facing East
-            "W": {"pos": [-140, 0, 5], "rot": 270},  # Facing West
-        }
-
-        self.direction = random.choice(list(spawn_points.keys()))
-        spawn_data = spawn_points[self.direction]
-        self.position = spawn_data["pos"]
-        self.rotation = spawn_data["rot"]
-        self.lane = random.choice([0, 1])
+    def assign_spawn_point(self, entry=None, destination=None):
+        """Pick an origin and destination lane and start at the origin."""
+        network = self.model.road_network
+        if entry is None:
+            entry = self.model.random.choice(list(network.entries))
+        if destination is None:
+            destination = self.model.random.choice(network.destinations[entry])
+        self.origin = entry
+        self.destination = destination
+        x, z = network.entries[entry]
+        self.position = [x, 0.0, z]
 
     def calculate_path(self):
-        """Calculate waypoints based on spawn position and direction"""
-        if self.direction in ["N", "S"]:
-            self.calculate_vertical_path()
-        else:
-            self.calculate_horizontal_path()
-
-    def calculate_vertical_path(self):
-        """Calculate path for north-south movement"""
-        current_z = self.position[2]
-        target_z = -current_z  # Opposite end of the road
-
-        self.path = []
-        if self.direction == "N":
-            self.path.append((self.position[0], 0, 30))  # Traffic light position
-            self.path.append((self.position[0], 0, target_z))
-        else:
-            self.path.append((self.position[0], 0, -30))  # Traffic light position
-            self.path.append((self.position[0], 0, target_z))
-
-    def calculate_horizontal_path(self):
-        """Calculate path for east-west movement"""
-        current_x = self.position[0]
-        target_x = -current_x  # Opposite end of the road
-        self.path = []
-        if self.direction == "E":
-            self.path.append((90, 0, self.position[2]))  # Traffic light position
-            self.path.append((target_x, 0, self.position[2]))
+        """Look up the cached route from origin to destination"""
+        self.path = self.model.road_network.route(self.origin, self.destination)
+        self._update_heading()
+
+    def place_on_route(self, point, waypoints):
+        """Start from a point along the route, with the waypoints after it"""
+        self.position = [point[0], 0.0, point[1]]
+        self.path = waypoints
+        self._update_heading()
+
+    def reach_waypoint(self):
+        super().reach_waypoint()
+        self._update_heading()
+
+    def _update_heading(self):
+        """Point the heading towards the current waypoint"""
+        if not self.path:
+            return
+        dx = self.path[0][0] - self.position[0]
+        dz = self.path[0][2] - self.position[2]
+        distance = (dx**2 + dz**2) ** 0.5
+        if distance > 0:
+            self.heading = (float(dx / distance), float(dz / distance))
+            self._face_heading()
+
+    def _face_heading(self):
+        """Derive the compass direction and model rotation from the heading"""
+        hx, hz = self.heading
+        if abs(hz) >= abs(hx):
+            self.direction = "N" if hz > 0 else "S"
         else:
-            self.path.append((-90, 0, self.position[2]))  # Traffic light position
-            self.path.append((target_x, 0, self.position[2]))
+            self.direction = "E" if hx > 0 else "W"
+        # The car model faces -z at rotation 0
+        self.rotation = math.degrees(math.atan2(-hx, -hz)) % 360.0
 
-    def check_traffic_light(self, traffic_lights):
-        """Check if vehicle should stop at its assigned traffic light"""
-
-        # Assign a traffic light only once
-        if self.assigned_light is None:
-            for light in traffic_lights:
-                if (
-                    self.direction in ["N", "S"]
-                    and light.controls_direction == "NS"
-                    and abs(self.position[2] - light.z) < 15
-                ):
-                    self.assigned_light = light
-                    break
-
-                elif (
-                    self.direction in ["E", "W"]
-                    and light.controls_direction == "EW"
-                    and abs(self.position[0] - light.x) < 15
-                ):
-                    self.assigned_light = light
-                    break
+    def is_collision_ahead(self, lane_index) -> bool:
+        """
+        Check if the vehicle directly ahead in the same lane is too close.
+        Returns True if collision is detected, False otherwise.
+        """
+        gap = lane_index.gap_to_leader(self)
+        return gap is not None and gap < self.safe_distance
 
-        # If no light was assigned, keep moving
-        if self.assigned_light is None:
-            return False
+    def _next_turn(self, lane_index):
+        """
+        Return (distance to the corner, vehicle just behind it, last vehicle
+        at or past it) on the lane this vehicle turns into next, or None
+        when it is not about to turn. Every waypoint but the last is a
+        corner.
+        """
+        if len(self.path) < 2:
+            return None
+        corner, after = self.path[0], self.path[1]
+        to_corner = math.hypot(
+            corner[0] - self.position[0], corner[2] - self.position[2]
+        )
+        if to_corner >= self.safe_distance:
+            return None
+        dx, dz = after[0] - corner[0], after[2] - corner[2]
+        length = math.hypot(dx, dz)
+        hx, hz = dx / length, dz / length
+        key = (hx, hz, round(corner[2] * hx - corner[0] * hz))
+        start = corner[0] * hx + corner[2] * hz
+        behind, ahead = lane_index.around(key, start)
+        if behind is not None:
+            behind = (behind[0], start - behind[1])
+        if ahead is not None:
+            ahead = (ahead[0], ahead[1] - start)
+        return to_corner, behind, ahead
+
+    def turn_blocker(self, lane_index):
+        """
+        Return the vehicle leaving too little room on the lane this vehicle
+        is about to turn into, or None; the turn waits until it moves.
+        """
+        turn = self._next_turn(lane_index)
+        if turn is None or turn[2] is None:
+            return None
+        to_corner, _, (vehicle, gap) = turn
+        return vehicle if to_corner + gap < self.safe_distance else None
 
-        # If the vehicle is already crossing, ignore the red light
-        if self.crossing_intersection:
+    def must_yield_at_turn(self, lane_index) -> bool:
+        """
+        Check for traffic on the lane this vehicle turns into that it would
+        end up less than a vehicle length ahead of: a vehicle within a
+        length of the corner, stopped or not, or a moving one that reaches
+        the corner before this vehicle has cleared it.
+        """
+        turn = self._next_turn(lane_index)
+        if turn is None or turn[1] is None:
             return False
-
-        # Calculate distance to light based on direction
-        if self.direction in ["N", "S"]:
-            distance_to_light = abs(self.position[2] - self.assigned_light.z)
-        else:  # E, W
-            distance_to_light = abs(self.position[0] - self.assigned_light.x)
-
-        # Add debug logging
-        if distance_to_light < 5:
-            print(f"Vehicle at {self.position} direction {self.direction}")
-            print(f"Distance to light: {distance_to_light}")
-            print(f"Light state: {'red' if self.assigned_light.is_red() else 'green'}")
-
-        # Check if we should stop
-        if distance_to_light < 5 and self.assigned_light.is_red():
-            self.waiting_at_light = True
+        to_corner, (vehicle, distance), _ = turn
+        if distance < self.length:
             return True
+        return not vehicle.blocked and distance < to_corner + self.length
 
-        # Explicitly clear waiting state when light is green
-        if self.waiting_at_light and not self.assigned_light.is_red():
-            self.waiting_at_light = False
-
-        return False
-
-    def is_collision_ahead(self, other_vehicles) -> bool:
+    def box_blocked(self, lane_index) -> bool:
         """
-        Check if there's a vehicle ahead that would cause a collision.
-        Returns True if collision is detected, False otherwise.
+        Check whether this vehicle is about to enter an intersection it could
+        not leave. The lane the route exits by must be clear from the box to
+        a safe distance beyond it, so vehicles do not wait inside one.
+        Vehicles wait BOX_MARGIN short of the box.
         """
-        if not other_vehicles:
+        if not self.path:
             return False
-
-        # Define collision detection parameters
-        collision_box = {
-            "length": self.length,  # Vehicle length
-            "width": self.width,  # Vehicle width
-            "lane_tolerance": 0.5,  # Allow some tolerance for lane changes
-        }
-
-        for other in other_vehicles:
-            if other is self:  # Skip self
+        x, z = float(self.position[0]), float(self.position[2])
+        hx, hz = self.heading
+        front = self.length / 2 + BOX_MARGIN
+        reach = front + self.speed * self.model.clock.dt
+        for (
+            x_min,
+            x_max,
+            z_min,
+            z_max,
+        ) in self.model.road_network.intersections.values():
+            if x_min <= x <= x_max and z_min <= z <= z_max:
+                return False  # Already inside, clear it
+            if hx and z_min <= z <= z_max:
+                distance = ((x_min if hx > 0 else x_max) - x) * hx
+            elif hz and x_min <= x <= x_max:
+                distance = ((z_min if hz > 0 else z_max) - z) * hz
+            else:
                 continue
+            if front <= distance <= reach:
+                box = (x_min, x_max, z_min, z_max)
+                break
+        else:
+            return False
 
-            # Check if other vehicle is in detection box
-            if self._vehicle_in_detection_box(
-                other, collision_box, collision_box["lane_tolerance"]
-            ):
-                # Adjust the logic to allow passing through
-                if abs(self.position[0] - other.position[0]) < collision_box["width"]:
-                    return False  # Allow passing through
-                return True  # Collision detected
-
+        # The lane the route leaves by must have room beyond the box, and
+        # no vehicle already inside may be heading for the same lane
+        exit = self._box_exit(box, x, z)
+        if exit is None:
+            return False
+        key, start, depth = exit
+        # Vehicles closer to the box than `front` have committed to it
+        x_min, x_max, z_min, z_max = box
+        radius = max(x_max - x_min, z_max - z_min) / 2 + front
+        nearby = self.model.vehicle_index.query(
+            (x_min + x_max) / 2, (z_min + z_max) / 2, radius
+        )
+        for vehicle in nearby:
+            vx, vz = float(vehicle.position[0]), float(vehicle.position[2])
+            committed = (
+                x_min - front < vx < x_max + front
+                and z_min - front < vz < z_max + front
+            )
+            if vehicle is self or not committed:
+                continue
+            other = vehicle._box_exit(box, vx, vz)
+            if other is not None and other[0] == key:
+                return True
+        for _, progress in lane_index.vehicles_from(key, start - depth):
+            return progress < start + self.safe_distance
         return False
 
-    def _get_detection_box(self, collision_params) -> dict:
-        """Calculate detection box coordinates based on vehicle direction"""
-        x, _, z = self.position
-        length = collision_params["length"]
-        safe_dist = collision_params["safe_distance"]
-        width = collision_params["width"]
-
-        if self.direction == "E":
-            return {
-                "x_min": x,
-                "x_max": x + safe_dist,
-                "z_min": z - width / 2,
-                "z_max": z + width / 2,
-            }
-        elif self.direction == "W":
-            return {
-                "x_min": x - safe_dist,
-                "x_max": x,
-                "z_min": z - width / 2,
-                "z_max": z + width / 2,
-            }
-        elif self.direction == "N":
-            return {
-                "x_min": x - width / 2,
-                "x_max": x + width / 2,
-                "z_min": z,
-                "z_max": z + safe_dist,
-            }
-        else:  # South
-            return {
-                "x_min": x - width / 2,
-                "x_max": x + width / 2,
-                "z_min": z - safe_dist,
-                "z_max": z,
-            }
-
-    def _vehicle_in_detection_box(
-        self, other_vehicle, detection_box, lane_tolerance
-    ) -> bool:
+    def _box_exit(self, box, x: float, z: float):
         """
-        Check if another vehicle is within the detection box.
+        Follow the route from (x, z) to where it leaves `box`; return the
+        exit lane key, the progress of the exit along it and the depth of
+        the box in that direction, or None if the route ends inside.
         """
-        # Calculate the detection box boundaries
-        detection_box["x_min"] = self.position[0] - (detection_box["length"] / 2)
-        detection_box["x_max"] = self.position[0] + (detection_box["length"] / 2)
-        detection_box["y_min"] = self.position[1] - (detection_box["width"] / 2)
-        detection_box["y_max"] = self.position[1] + (detection_box["width"] / 2)
-
-        # Check if the other vehicle is within the detection box
-        other_x = other_vehicle.position[0]
-        other_y = other_vehicle.position[1]
-
-        return (
-            other_x >= detection_box["x_min"]
-            and other_x <= detection_box["x_max"]
-            and other_y >= detection_box["y_min"]
-            and other_y <= detection_box["y_max"]
-        )
+        x_min, x_max, z_min, z_max = box
+        a = (x, z)
+        for waypoint in self.path:
+            b = (waypoint[0], waypoint[2])
+            if not (x_min <= b[0] <= x_max and z_min <= b[1] <= z_max):
+                break
+            a = b
+        else:
+            return None
+        length = math.hypot(b[0] - a[0], b[1] - a[1])
+        ux, uz = (b[0] - a[0]) / length, (b[1] - a[1]) / length
+        if ux:
+            exit = (x_max if ux > 0 else x_min, a[1])
+            depth = x_max - x_min
+        else:
+            exit = (a[0], z_max if uz > 0 else z_min)
+            depth = z_max - z_min
+        key = (ux, uz, round(exit[1] * ux - exit[0] * uz))
+        return key, exit[0] * ux + exit[1] * uz, depth
 
     def get_distance_to_vehicle(self, other_vehicle) -> float:
         """Calculate distance to another vehicle"""
@@ -237,44 +240,3 @@ class VehicleAgent(ap.Agent):
             return abs(other_vehicle.position[0] - self.position[0])
         else:  # N, S
             return abs(other_vehicle.position[2] - self.position[2])
-
-    def move(self, traffic_lights, should_stop=False):
-        """Move the vehicle along its path, respecting traffic signals and other vehicles"""
-        if should_stop:
-            return
-
-        if not self.path:
-            return  # No path to follow
-
-        # Get current target waypoint
-        target = self.path[0]
-        dx = target[0] - self.position[0]
-        dz = target[2] - self.position[2]
-        distance = (dx**2 + dz**2) ** 0.5
-
-        # If vehicle reaches target, move to next waypoint
-        if distance < self.speed:
-            self.position = list(target)
-            self.path.pop(0)
-        else:
-            # Calculate movement
-            move_x = (dx / distance) * self.speed
-            move_z = (dz / distance) * self.speed
-
-            # Update position if no collision detected
-            if not hasattr(self, "collision_ahead") or not self.collision_ahead:
-                self.position[0] += move_x
-                self.position[2] += move_z
-
-    def draw(self):
-        """Render the vehicle in the OpenGL scene"""
-        if self.model is None:
-            return
-
-        glPushMatrix()
-        glTranslatef(*self.position)
-        glRotatef(self.rotation, 0, 1, 0)
-        glScalef(self.scale, self.scale, self.scale)
-        glRotatef(270, 1, 0, 0)
-        self.model.render()
-        glPopMatrix()
@@ -0,0 +1,238 @@
+# models/arrivals.py
+import csv
+import heapq
+import itertools
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence
+
+
+class ConstantRate:
+    """Homogeneous Poisson demand, `rate` arrivals per simulated second"""
+
+    def __init__(self, rate: float):
+        if rate < 0:
+            raise ValueError("Arrival rates cannot be negative")
+        self.rate = float(rate)
+
+    def rate_at(self, time: float) -> float:
+        return self.rate
+
+    def next_arrival(self, time: float, rng) -> float:
+        """Draw the first arrival after `time`; math.inf if there is none"""
+        if self.rate == 0:
+            return math.inf
+        return time + rng.expovariate(self.rate)
+
+
+class PiecewiseRate:
+    """Demand that is constant between consecutive start times.
+
+    `starts` are seconds into the run (or into the cycle when `period` is
+    set, e.g. 86400 for a daily profile that repeats). Before the first
+    start the rate is zero; without a period the last rate holds forever.
+    Arrivals are drawn by inverting the integrated rate, so a quiet
+    interval costs nothing and a peak needs no rejection sampling.
+    """
+
+    def __init__(
+        self,
+        starts: Sequence[float],
+        rates: Sequence[float],
+        period: Optional[float] = None,
+    ):
+        if not starts or len(starts) != len(rates):
+            raise ValueError("A piecewise rate needs one rate per start time")
+        if any(b <= a for a, b in zip(starts, starts[1:])):
+            raise ValueError("Start times must be strictly increasing")
+        if any(rate < 0 for rate in rates):
+            raise ValueError("Arrival rates cannot be negative")
+        if period is not None and (period <= 0 or starts[-1] >= period):
+            raise ValueError("Start times must fall inside the period")
+        self.starts = [float(start) for start in starts]
+        self.rates = [float(rate) for rate in rates]
+        self.period = period
+
+    def _locate(self, time: float):
+        """Return (cycle, index) of the piece containing `time`"""
+        if self.period is None:
+            return 0, bisect_right(self.starts, time) - 1
+        cycle = math.floor(time / self.period)
+        position = time - cycle * self.period
+        # The rounded quotient can put a time on a cycle boundary one off
+        if position < 0:
+            cycle, position = cycle - 1, position + self.period
+        elif position >= self.period:
+            cycle, position = cycle + 1, position - self.period
+        return cycle, bisect_right(self.starts, position) - 1
+
+    def _piece(self, cycle: int, index: int):
+        """Return (rate, end) of piece `index` of a cycle; -1 is before the first"""
+        base = cycle * self.period if self.period is not None else 0.0
+        if index + 1 < len(self.starts):
+            end = base + self.starts[index + 1]
+        elif self.period is not None:
+            end = base + self.period
+        else:
+            end = math.inf
+        rate = self.rates[index] if index >= 0 else 0.0
+        return rate, end
+
+    def _following(self, cycle: int, index: int):
+        """The piece after (cycle, index), wrapping into the next cycle"""
+        if index + 1 < len(self.starts):
+            return cycle, index + 1
+        return cycle + 1, -1 if self.starts[0] > 0 else 0
+
+    def rate_at(self, time: float) -> float:
+        return self._piece(*self._locate(time))[0]
+
+    def next_arrival(self, time: float, rng) -> float:
+        """Draw the first arrival after `time`; math.inf if there is none"""
+        if not any(self.rates):
+            return math.inf
+        work = rng.expovariate(1.0)
+        # Pieces are walked by (cycle, index) rather than by time, so ends
+        # that round onto `time` cannot stall the search
+        cycle, index = self._locate(time)
+        while True:
+            rate, end = self._piece(cycle, index)
+            length = max(end - time, 0.0)
+            if rate > 0 and work <= rate * length:
+                return time + work / rate
+            if end == math.inf:
+                return math.inf
+            work -= rate * length
+            time = max(time, end)
+            cycle, index = self._following(cycle, index)
+
+
+def load_count_profiles(path: str, period: Optional[float] = None) -> Dict:
+    """Read observed counts from a CSV file into PiecewiseRate profiles.
+
+    Each row gives `start_s`, `end_s` and `count` for one interval; rates
+    are counts per second. An optional `entry` column keys the profiles by
+    spawn point, otherwise the single profile is returned under None and
+    applies to every entry. Gaps between intervals have zero demand, and
+    so does the time after the last one unless `period` repeats the data;
+    intervals must then end within the period.
+    """
+    bins = defaultdict(list)
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            start, end = float(row["start_s"]), float(row["end_s"])
+            if end <= start:
+                raise ValueError(f"{path}: interval ends before it starts")
+            if period is not None and end > period:
+                raise ValueError(
+                    f"{path}: interval {start:g}-{end:g} s ends after the"
+                    f" {period:g} s period"
+                )
+            bins[row.get("entry") or None].append(
+                (start, end, float(row["count"]) / (end - start))
+            )
+
+    profiles = {}
+    for entry, rows in bins.items():
+        rows.sort()
+        starts: List[float] = []
+        rates: List[float] = []
+        for start, end, rate in rows:
+            if starts and start < previous_end:
+                raise ValueError(f"{path}: overlapping intervals for {entry}")
+            if starts and start > previous_end:
+                starts.append(previous_end)
+                rates.append(0.0)
+            starts.append(start)
+            rates.append(rate)
+            previous_end = end
+        if period is None or previous_end < period:
+            starts.append(previous_end)
+            rates.append(0.0)
+        profiles[entry] = PiecewiseRate(starts, rates, period)
+    return profiles
+
+
+def demand_profiles(
+    spec,
+    entries: Sequence[Hashable],
+    total_rate: float,
+    period: Optional[float] = None,
+) -> Dict:
+    """Build one profile per entry from a model parameter.
+
+    `spec` may be None (use `total_rate`), a number of arrivals per second
+    shared evenly by the entries, a CSV path for load_count_profiles (with
+    `period`), a single profile used by every entry, or a dict mapping
+    entries to numbers or profiles. Entries missing from a dict get no
+    demand.
+    """
+    if spec is None:
+        spec = total_rate
+    if isinstance(spec, (int, float)):
+        return {entry: ConstantRate(spec / len(entries)) for entry in entries}
+    if isinstance(spec, str):
+        spec = load_count_profiles(spec, period)
+        if None in spec:
+            return {entry: spec[None] for entry in entries}
+    if isinstance(spec, dict):
+        unknown = set(spec) - set(entries)
+        if unknown:
+            raise ValueError(f"Unknown spawn entries: {sorted(map(str, unknown))}")
+        return {
+            entry: (
+                ConstantRate(spec[entry])
+                if isinstance(spec[entry], (int, float))
+                else spec[entry]
+            )
+            for entry in entries
+            if entry in spec
+        }
+    return {entry: spec for entry in entries}
+
+
+class ArrivalScheduler:
+    """Poisson arrivals for several spawn points, popped from a min-heap.
+
+    Each entry keeps its next arrival time in the heap, so a step without
+    due arrivals is one comparison and no random draws. Arrivals that find
+    their spawn zone occupied queue up per entry and are released one per
+    step once the zone is clear, so demand is delayed rather than lost.
+    """
+
+    def __init__(self, profiles: Dict, rng, start: float = 0.0):
+        self.profiles = profiles
+        self.rng = rng
+        self.waiting = {entry: 0 for entry in profiles}
+        self._heap = []
+        self._sequence = itertools.count()  # Tie-breaker for equal times
+        for entry in profiles:
+            self._schedule(entry, start)
+
+    def __len__(self):
+        """Arrivals that are due but still waiting for a clear spawn zone"""
+        return sum(self.waiting.values())
+
+    def _schedule(self, entry, after: float):
+        time = self.profiles[entry].next_arrival(after, self.rng)
+        if time != math.inf:
+            heapq.heappush(self._heap, (time, next(self._sequence), entry))
+
+    def next_arrival_time(self) -> float:
+        return self._heap[0][0] if self._heap else math.inf
+
+    def release(self, now: float, is_clear: Callable[[Hashable], bool]) -> list:
+        """Return the entries that should spawn one agent at time `now`"""
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            time, _, entry = heapq.heappop(heap)
+            self.waiting[entry] += 1
+            self._schedule(entry, time)
+
+        ready = [
+            entry for entry, count in self.waiting.items() if count and is_clear(entry)
+        ]
+        for entry in ready:
+            self.waiting[entry] -= 1
+        return ready
@@ -0,0 +1,31 @@
+# models/clock.py
+
+DEFAULT_DT = 1.0 / 60.0  # One simulated frame at 60 FPS
+
+
+class SimulationClock:
+    """Fixed-timestep clock that measures simulated time, not wall time.
+
+    Time is derived from the number of completed steps, so a run produces
+    the same light phases and agent positions whether it is stepped at
+    60 FPS or thousands of times per second.
+    """
+
+    def __init__(self, dt: float = DEFAULT_DT):
+        if dt <= 0:
+            raise ValueError("Clock timestep must be positive")
+        self.dt = dt
+        self.step_count = 0
+
+    @property
+    def now(self) -> float:
+        """Simulated seconds elapsed since the start of the run"""
+        return self.step_count * self.dt
+
+    def tick(self) -> float:
+        """Advance the clock by one timestep and return the new time"""
+        self.step_count += 1
+        return self.now
+
+    def reset(self):
+        self.step_count = 0
@@ -0,0 +1,89 @@
+# models/intersections.py
+from typing import Dict, List, Optional, Tuple
+
+
+class Approach:
+    """A stop block as seen from one lane: where along the lane it starts and ends"""
+
+    __slots__ = ("block", "light", "intersection", "progress_min", "progress_max")
+
+    def __init__(self, block, progress_min: float, progress_max: float):
+        self.block = block
+        self.light = block.light
+        self.intersection = block.intersection
+        self.progress_min = progress_min
+        self.progress_max = progress_max
+
+
+def _lane_interval(lane_key, block) -> Optional[Tuple[float, float]]:
+    """Progress interval in which a lane's centre line lies inside a block.
+
+    Uses the slab method on the block's bounds for the line
+    ``(x, z) = origin + progress * heading`` of the lane.
+    """
+    hx, hz, offset = lane_key
+    # Point of the lane at progress 0 (inverse of lanes.lane_coordinates)
+    x0 = -offset * hz
+    z0 = offset * hx
+
+    low, high = float("-inf"), float("inf")
+    for origin, direction, bound_min, bound_max in (
+        (x0, hx, block.x_min, block.x_max),
+        (z0, hz, block.z_min, block.z_max),
+    ):
+        if direction == 0:
+            if not bound_min <= origin <= bound_max:
+                return None
+            continue
+        t0 = (bound_min - origin) / direction
+        t1 = (bound_max - origin) / direction
+        if t0 > t1:
+            t0, t1 = t1, t0
+        low, high = max(low, t0), min(high, t1)
+
+    if low > high:
+        return None
+    return low, high
+
+
+class ApproachIndex:
+    """Maps each lane to the stop blocks on it, computed once per lane.
+
+    Block extents are converted to progress intervals along the lane, so
+    checking whether a vehicle is held reduces to comparing its progress
+    against cached bounds of the few blocks on its own lane.
+    """
+
+    def __init__(self, stop_blocks):
+        self.stop_blocks = list(stop_blocks)
+        self._lanes: Dict[tuple, List[Approach]] = {}
+
+    def approaches(self, lane_key) -> List[Approach]:
+        """Stop blocks crossed by a lane, ordered along the direction of travel"""
+        approaches = self._lanes.get(lane_key)
+        if approaches is None:
+            approaches = []
+            for block in self.stop_blocks:
+                interval = _lane_interval(lane_key, block)
+                if interval is not None:
+                    approaches.append(Approach(block, *interval))
+            approaches.sort(key=lambda approach: approach.progress_min)
+            self._lanes[lane_key] = approaches
+        return approaches
+
+    def light_ahead(self, lane_key, progress: float):
+        """Return the light of the next stop block not yet passed, if any"""
+        for approach in self.approaches(lane_key):
+            if progress <= approach.progress_max:
+                return approach.light
+        return None
+
+    def holding_block(self, lane_key, progress: float):
+        """Return the active stop block holding a vehicle at `progress`, if any"""
+        for approach in self.approaches(lane_key):
+            if (
+                approach.block.active
+                and approach.progress_min <= progress <= approach.progress_max
+            ):
+                return approach.block
+        return None
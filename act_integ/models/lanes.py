@@ -0,0 +1,193 @@
+# models/lanes.py
+from typing import Dict, Optional, Tuple
+
+
+class _LaneNode:
+    __slots__ = ("vehicle", "key", "progress", "ahead", "behind")
+
+    def __init__(self, vehicle, key, progress):
+        self.vehicle = vehicle
+        self.key = key
+        self.progress = progress
+        self.ahead: Optional["_LaneNode"] = None
+        self.behind: Optional["_LaneNode"] = None
+
+
+class _LaneQueue:
+    """Doubly linked list of vehicles, front-most vehicle at the head"""
+
+    __slots__ = ("head", "tail", "size")
+
+    def __init__(self):
+        self.head: Optional[_LaneNode] = None
+        self.tail: Optional[_LaneNode] = None
+        self.size = 0
+
+
+def lane_coordinates(vehicle) -> Tuple[tuple, float]:
+    """Return the lane key and the distance travelled along that lane.
+
+    Vehicles moving the same way along the same line share a key; the
+    progress grows in the direction of travel.
+    """
+    hx, hz = vehicle.heading
+    x = float(vehicle.position[0])
+    z = float(vehicle.position[2])
+    progress = x * hx + z * hz
+    offset = z * hx - x * hz
+    return (hx, hz, round(offset)), progress
+
+
+class LaneIndex:
+    """Vehicles grouped by lane and kept sorted by distance along it.
+
+    Every vehicle knows its immediate leader through a linked list, so
+    leader lookups are O(1) and re-sorting after a move only compares a
+    vehicle with the one directly ahead.
+    """
+
+    def __init__(self):
+        self.lanes: Dict[tuple, _LaneQueue] = {}
+        self._nodes: Dict[int, _LaneNode] = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, vehicle):
+        return id(vehicle) in self._nodes
+
+    def insert(self, vehicle):
+        """Add a vehicle to its lane, usually at the back of the queue"""
+        key, progress = lane_coordinates(vehicle)
+        node = _LaneNode(vehicle, key, progress)
+        self._nodes[id(vehicle)] = node
+        self._link(node)
+
+    def remove(self, vehicle):
+        node = self._nodes.pop(id(vehicle), None)
+        if node is not None:
+            self._unlink(node)
+
+    def update(self, vehicle):
+        """Re-position a vehicle in its queue after it moved"""
+        node = self._nodes.get(id(vehicle))
+        if node is None:
+            self.insert(vehicle)
+            return
+
+        key, progress = lane_coordinates(vehicle)
+        node.progress = progress
+        if key != node.key:
+            # The vehicle turned onto another lane
+            self._unlink(node)
+            node.key = key
+            self._link(node)
+            return
+
+        # Vehicles only move forward, so at most swap with those just ahead
+        while node.ahead is not None and node.ahead.progress < progress:
+            self._swap_with_ahead(node)
+
+    def coordinates(self, vehicle) -> Tuple[tuple, float]:
+        """Lane key and progress as of the vehicle's last insert or update"""
+        node = self._nodes.get(id(vehicle))
+        if node is None:
+            return lane_coordinates(vehicle)
+        return node.key, node.progress
+
+    def leader(self, vehicle):
+        """Return the vehicle directly ahead in the same lane, if any"""
+        node = self._nodes.get(id(vehicle))
+        if node is None or node.ahead is None:
+            return None
+        return node.ahead.vehicle
+
+    def gap_to_leader(self, vehicle) -> Optional[float]:
+        """Distance along the lane to the leader, or None without a leader"""
+        node = self._nodes.get(id(vehicle))
+        if node is None or node.ahead is None:
+            return None
+        return node.ahead.progress - node.progress
+
+    def around(self, key, progress: float):
+        """Return the vehicles just behind and at or past `progress` on lane
+        `key`, each as (vehicle, progress) or None"""
+        queue = self.lanes.get(key)
+        behind = None
+        node = queue.tail if queue is not None else None
+        while node is not None and node.progress < progress:
+            behind = node
+            node = node.ahead
+        return (
+            (behind.vehicle, behind.progress) if behind is not None else None,
+            (node.vehicle, node.progress) if node is not None else None,
+        )
+
+    def vehicles_from(self, key, progress: float):
+        """Yield (vehicle, progress) on lane `key` from `progress` onwards,
+        front-most last"""
+        queue = self.lanes.get(key)
+        node = queue.tail if queue is not None else None
+        while node is not None:
+            if node.progress >= progress:
+                yield node.vehicle, node.progress
+            node = node.ahead
+
+    def _link(self, node):
+        queue = self.lanes.get(node.key)
+        if queue is None:
+            queue = self.lanes[node.key] = _LaneQueue()
+
+        # Walk from the back: new vehicles normally enter behind everyone
+        behind = None
+        ahead = queue.tail
+        while ahead is not None and ahead.progress < node.progress:
+            behind = ahead
+            ahead = ahead.ahead
+
+        node.ahead = ahead
+        node.behind = behind
+        if ahead is None:
+            queue.head = node
+        else:
+            ahead.behind = node
+        if behind is None:
+            queue.tail = node
+        else:
+            behind.ahead = node
+        queue.size += 1
+
+    def _unlink(self, node):
+        queue = self.lanes[node.key]
+        if node.ahead is None:
+            queue.head = node.behind
+        else:
+            node.ahead.behind = node.behind
+        if node.behind is None:
+            queue.tail = node.ahead
+        else:
+            node.behind.ahead = node.ahead
+        node.ahead = node.behind = None
+        queue.size -= 1
+        if queue.size == 0:
+            del self.lanes[node.key]
+
+    def _swap_with_ahead(self, node):
+        queue = self.lanes[node.key]
+        ahead = node.ahead
+        behind = node.behind
+
+        # behind -> node -> ahead -> further   becomes   behind -> ahead -> node -> further
+        further = ahead.ahead
+        node.ahead = further
+        node.behind = ahead
+        ahead.ahead = node
+        ahead.behind = behind
+        if further is None:
+            queue.head = node
+        else:
+            further.behind = node
+        if behind is None:
+            queue.tail = ahead
+        else:
+            behind.ahead = ahead
@@ -1,24 +1,60 @@
-import random
 from typing import List, Tuple, Optional
 import agentpy as ap
-from OpenGL.GL import *
-from OpenGL.GLUT import *
+from models.clock import DEFAULT_DT
+from models.state import StateView
 from objects.traffic_light import TrafficLight
 
-
-class PedestrianAgent(ap.Agent):
-    def setup(self):
-        """Initialize pedestrian attributes"""
+# Chance per DEFAULT_DT step that an impulsive pedestrian crosses against
+# the light; scaled to the model's timestep so the rate per second holds
+IMPULSIVE_CROSS_CHANCE = 0.3
+
+# Sidewalk strips at the map edge where pedestrians enter, by direction
+SPAWN_ZONES = {
+    "N": [
+        # Left vertical road
+        {"x_range": (-90, -50), "z": -140, "direction": "N"},
+        # Right vertical road
+        {"x_range": (50, 90), "z": -140, "direction": "N"},
+    ],
+    "S": [
+        # Left vertical road
+        {"x_range": (-90, -50), "z": 140, "direction": "S"},
+        # Right vertical road
+        {"x_range": (50, 90), "z": 140, "direction": "S"},
+    ],
+    "E": [
+        # Top horizontal road
+        {"x": -140, "z_range": (-20, 20), "direction": "E"}
+    ],
+    "W": [
+        # Top horizontal road
+        {"x": 140, "z_range": (-20, 20), "direction": "W"}
+    ],
+}
+
+
+class PedestrianAgent(StateView, ap.Agent):
+    def setup(self, entry=None):
+        """Initialize pedestrian attributes
+
+        `entry` picks the direction of the SPAWN_ZONES to start from; by
+        default one is drawn at random.
+        """
+        # Position, speed, path and flags live in the model's state store
+        self._bind_state(self.model.pedestrian_state)
         self.position = [0.0, 0.0, 0.0]
-        self.speed = 0.3
+        self.speed = 18.0  # Units per simulated second
         self.direction = "N"  # N, S, E, W
         self.path = []
         self.waiting_to_cross = False
-        self.personality = random.choice(["patient", "aggressive", "impulsive"])
+        self.destination = None  # Sidewalk end the pedestrian walks to
+        self.personality = self.model.random.choice(
+            ["patient", "aggressive", "impulsive"]
+        )
         self.size = 2.0
         self.color = self._get_personality_color()
 
-        self.assign_spawn_point()
+        self.assign_spawn_point(entry)
         self.calculate_path()
 
     def _get_personality_color(self) -> Tuple[float, float, float]:
@@ -30,40 +66,18 @@ class PedestrianAgent(ap.Agent):
         }
         return colors[self.personality]
 
-    def assign_spawn_point(self):
-        """Assign random spawn location on sidewalk"""
-        # Define spawn zones on sidewalks
-        spawn_zones = {
-            "N": [
-                # Left vertical road
-                {"x_range": (-90, -50), "z": -140, "direction": "N"},
-                # Right vertical road
-                {"x_range": (50, 90), "z": -140, "direction": "N"},
-            ],
-            "S": [
-                # Left vertical road
-                {"x_range": (-90, -50), "z": 140, "direction": "S"},
-                # Right vertical road
-                {"x_range": (50, 90), "z": 140, "direction": "S"},
-            ],
-            "E": [
-                # Top horizontal road
-                {"x": -140, "z_range": (-20, 20), "direction": "E"}
-            ],
-            "W": [
-                # Top horizontal road
-                {"x": 140, "z_range": (-20, 20), "direction": "W"}
-            ],
-        }
-
-        # Select random spawn direction and zone
-        self.direction = random.choice(list(spawn_zones.keys()))
-        zone = random.choice(spawn_zones[self.direction])
+    def assign_spawn_point(self, entry=None):
+        """Assign a spawn location on the sidewalk, at a random entry by default"""
+        # Select spawn direction and a random zone along it
+        if entry is None:
+            entry = self.model.random.choice(list(SPAWN_ZONES.keys()))
+        self.direction = entry
+        zone = self.model.random.choice(SPAWN_ZONES[self.direction])
 
         # Set position based on zone
         if self.direction in ["N", "S"]:
             self.position = [
-                random.uniform(zone["x_range"][0], zone["x_range"][1]),
+                self.model.random.uniform(zone["x_range"][0], zone["x_range"][1]),
                 0,
                 zone["z"],
             ]
@@ -71,151 +85,30 @@ class PedestrianAgent(ap.Agent):
             self.position = [
                 zone["x"],
                 0,
-                random.uniform(zone["z_range"][0], zone["z_range"][1]),
+                self.model.random.uniform(zone["z_range"][0], zone["z_range"][1]),
             ]
 
     def calculate_path(self):
-        """Calculate path including sidewalk movement and crossings"""
-        if self.direction in ["N", "S"]:
-            self.calculate_vertical_path()
-        else:
-            self.calculate_horizontal_path()
-
-    def calculate_vertical_path(self):
-        """Calculate path for north-south movement including sidewalk navigation"""
-        current_x, _, current_z = self.position
-
-        # Determine which vertical road we're on
-        if -90 <= current_x <= -50:  # Left vertical road
-            if self.direction == "N":
-                # Use west sidewalk (-90 - sidewalk_width)
-                target_x = -95
-            else:
-                # Use east sidewalk (-50 + sidewalk_width)
-                target_x = -45
-        else:  # Right vertical road (50 <= current_x <= 90)
-            if self.direction == "N":
-                # Use west sidewalk (50 - sidewalk_width)
-                target_x = 45
-            else:
-                # Use east sidewalk (90 + sidewalk_width)
-                target_x = 95
-
-        target_z = -current_z  # Opposite end of road
-
-        # Add waypoints including sidewalk approach and crosswalk points
-        self.path = []
-
-        # First move to correct sidewalk if not already there
-        if abs(current_x - target_x) > 0.5:
-            self.path.append((target_x, 0, current_z))
-
-        if self.direction == "N":
-            # Add crosswalk approach points
-            if current_z < -25:
-                # Approach crosswalk on sidewalk
-                self.path.append((target_x, 0, -25))
-                # Move to crosswalk
-                self.path.append((target_x, 0, -22))
-                # Cross the road
-                self.path.append((target_x, 0, 22))
-                # Return to sidewalk
-                self.path.append((target_x, 0, 25))
-            # Continue to destination on sidewalk
-            self.path.append((target_x, 0, target_z))
-        else:  # Direction is "S"
-            if current_z > 25:
-                # Approach crosswalk on sidewalk
-                self.path.append((target_x, 0, 25))
-                # Move to crosswalk
-                self.path.append((target_x, 0, 22))
-                # Cross the road
-                self.path.append((target_x, 0, -22))
-                # Return to sidewalk
-                self.path.append((target_x, 0, -25))
-            # Continue to destination on sidewalk
-            self.path.append((target_x, 0, target_z))
-
-    def calculate_horizontal_path(self):
-        """Calculate path for east-west movement including sidewalk navigation"""
-        current_x, _, current_z = self.position
-        target_x = -current_x
-
-        # Determine which sidewalk to use (north or south)
-        if self.direction == "E":
-            # Use north sidewalk
-            target_z = 25
-        else:
-            # Use south sidewalk
-            target_z = -25
-
-        # Add waypoints including sidewalk approach and crosswalk points
-        self.path = []
-
-        # First move to correct sidewalk if not already there
-        if abs(current_z - target_z) > 0.5:
-            self.path.append((current_x, 0, target_z))
-
-        if self.direction == "E":
-            if current_x < -50:
-                # Approach left intersection
-                self.path.append((-90, 0, target_z))
-                # Move to crosswalk
-                self.path.append((-87, 0, target_z))
-                # Cross the road
-                self.path.append((-53, 0, target_z))
-                # Return to sidewalk
-                self.path.append((-50, 0, target_z))
-            elif current_x < 50:
-                # Approach right intersection
-                self.path.append((50, 0, target_z))
-                # Move to crosswalk
-                self.path.append((53, 0, target_z))
-                # Cross the road
-                self.path.append((87, 0, target_z))
-                # Return to sidewalk
-                self.path.append((90, 0, target_z))
-        else:  # Direction is "W"
-            if current_x > 50:
-                # Approach right intersection
-                self.path.append((90, 0, target_z))
-                # Move to crosswalk
-                self.path.append((87, 0, target_z))
-                # Cross the road
-                self.path.append((53, 0, target_z))
-                # Return to sidewalk
-                self.path.append((50, 0, target_z))
-            elif current_x > -50:
-                # Approach left intersection
-                self.path.append((-50, 0, target_z))
-                # Move to crosswalk
-                self.path.append((-53, 0, target_z))
-                # Cross the road
-                self.path.append((-87, 0, target_z))
-                # Return to sidewalk
-                self.path.append((-90, 0, target_z))
-
-        # Continue to final destination on sidewalk
-        self.path.append((target_x, 0, target_z))
+        """Walk the sidewalks and crosswalks to a random end on another map edge"""
+        network = self.model.sidewalk_network
+        origin = (self.position[0], self.position[2])
+        self.destination = self.model.random.choice(network.destinations(origin))
+        self.path = network.route(origin, self.destination)
 
     def should_wait(self, traffic_lights) -> bool:
         """Determine if pedestrian should wait based on personality and traffic"""
         if self.personality == "aggressive":
             return False
         elif self.personality == "impulsive":
-            return random.random() < 0.3
+            return self.model.random.random() < 0.3
         else:  # patient
             return True
 
-    def move(self, traffic_lights, vehicles):
-        """Enhanced movement with better traffic awareness"""
+    def should_hold(self, traffic_lights, vehicle_index) -> bool:
+        """Decide whether to stay put this step, with traffic awareness"""
+        self.waiting_to_cross = False
         if not self.path:
-            return
-
-        target = self.path[0]
-        dx = target[0] - self.position[0]
-        dz = target[2] - self.position[2]
-        distance = (dx**2 + dz**2) ** 0.5
+            return True
 
         # Check if at crosswalk
         at_crosswalk = self._is_at_crosswalk()
@@ -227,23 +120,15 @@ class PedestrianAgent(ap.Agent):
                 should_wait = self._should_wait_at_crossing(traffic_light)
                 if should_wait:
                     self.waiting_to_cross = True
-                    return
+                    return True
 
         # Check for nearby vehicles if crossing
         if self._is_crossing_road():
-            if self._is_vehicle_too_close(vehicles):
+            if self._is_vehicle_too_close(vehicle_index):
                 self.waiting_to_cross = True
-                return
+                return True
 
-        # Move towards target
-        if distance < self.speed:
-            self.position = list(target)
-            self.path.pop(0)
-        else:
-            move_x = (dx / distance) * self.speed
-            move_z = (dz / distance) * self.speed
-            self.position[0] += move_x
-            self.position[2] += move_z
+        return False
 
     def _is_at_crosswalk(self) -> bool:
         """Check if pedestrian is at a crosswalk"""
@@ -290,9 +175,14 @@ class PedestrianAgent(ap.Agent):
 
         return False
 
-    def _is_vehicle_too_close(self, vehicles, safe_distance=30.0) -> bool:
-        """Check if any vehicle is too close for safe crossing"""
-        for vehicle in vehicles:
+    def _is_vehicle_too_close(self, vehicle_index, safe_distance=30.0) -> bool:
+        """Check if any moving vehicle is too close for safe crossing"""
+        x, _, z = self.position
+        for vehicle in vehicle_index.query(x, z, safe_distance):
+            # Vehicles already stopped (for a light or for us) are no threat;
+            # waiting on them would leave both sides waiting on each other
+            if vehicle.blocked:
+                continue
             dx = vehicle.position[0] - self.position[0]
             dz = vehicle.position[2] - self.position[2]
             distance = (dx**2 + dz**2) ** 0.5
@@ -300,14 +190,6 @@ class PedestrianAgent(ap.Agent):
                 return True
         return False
 
-    def draw(self):
-        """Render pedestrian as colored sphere"""
-        glPushMatrix()
-        glTranslatef(*self.position)
-        glColor3f(*self.color)
-        glutSolidSphere(self.size, 8, 8)
-        glPopMatrix()
-
     def _get_relevant_traffic_light(self, traffic_lights) -> Optional[TrafficLight]:
         """Get the relevant traffic light for the current crossing"""
         x, _, z = self.position
@@ -347,7 +229,9 @@ class PedestrianAgent(ap.Agent):
         # Impulsive pedestrians sometimes ignore unsafe conditions
         if self.personality == "impulsive":
             if not safe_to_cross:  # If it's not safe to cross
-                return random.random() > 0.3  # 30% chance to cross anyway
+                steps = self.model.clock.dt / DEFAULT_DT
+                chance = 1.0 - (1.0 - IMPULSIVE_CROSS_CHANCE) ** steps
+                return self.model.random.random() >= chance  # Cross anyway
             return False  # Cross if safe
 
         # Patient pedestrians only cross when safe
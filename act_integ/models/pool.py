@@ -0,0 +1,72 @@
+# models/pool.py
+from typing import List
+
+import numpy as np
+
+from models.state import AgentStateStore
+
+
+class AgentPool:
+    """Free list of finished agents of one type, reused for new spawns.
+
+    A reused agent gets a fresh id and runs ``setup`` again, exactly what
+    the agentpy constructor does, so spawns draw the same random numbers
+    and keep ids unique whether or not the agent came from the pool. Only
+    the Python object (and its attribute dict) is recycled.
+    """
+
+    def __init__(self, model, agent_type):
+        self.model = model
+        self.agent_type = agent_type
+        self.free: List = []
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, **kwargs):
+        """Return a ready agent, recycled if one is available
+
+        Keyword arguments are passed on to the agent's ``setup``.
+        """
+        if not self.free:
+            self.created += 1
+            return self.agent_type(self.model, **kwargs)
+        agent = self.free.pop()
+        agent.id = self.model._new_id()
+        agent.setup(**kwargs)
+        self.reused += 1
+        return agent
+
+    def release(self, agent):
+        """Give an agent's state slot back and keep the object for reuse"""
+        agent.release_state()
+        self.free.append(agent)
+
+
+def swap_remove_finished(agents: list, store: AgentStateStore, retire) -> int:
+    """Drop agents whose path is done from `agents` in place.
+
+    Finished agents are found from the store flags in one pass. The last
+    agent is moved into each gap instead of shifting the list or building
+    a new one; `retire` is called for every removed agent. Returns how
+    many were removed.
+    """
+    size = store.size
+    finished = np.flatnonzero(store.active[:size] & ~store.has_target[:size])
+    if not len(finished):
+        return 0
+    finished = set(finished.tolist())
+
+    index = 0
+    while index < len(agents):
+        agent = agents[index]
+        if agent.slot not in finished:
+            index += 1
+            continue
+        retire(agent)
+        last = agents.pop()
+        if index < len(agents):
+            agents[index] = last
+    return len(finished)
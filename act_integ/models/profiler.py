@@ -0,0 +1,118 @@
+# models/profiler.py
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class Profiler:
+    """Per-phase wall-clock timings for the simulation and render loops.
+
+    Code marks the end of each phase with lap(name); the time since the
+    previous lap on the same thread is attributed to that phase. Every call
+    returns immediately while the profiler is disabled, so the hooks can
+    stay in hot loops. When enabled, a rolling window of samples per phase
+    feeds the percentiles and a bounded event log feeds the trace export.
+    The simulation and render threads share one profiler, so the stored
+    samples are only touched under a lock.
+    """
+
+    def __init__(
+        self, enabled: bool = False, window: int = 300, trace_capacity: int = 200_000
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # phase -> deque of seconds
+        self.counts = {}  # name -> latest value, e.g. agent counts
+        self.trace = deque(maxlen=trace_capacity)  # (phase, start, duration, thread)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def start(self):
+        """Begin timing a new pass (one model step or one frame)"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._local.begin = self._local.last = now
+
+    def lap(self, phase: str):
+        """Attribute the time since the previous lap or start() to a phase"""
+        if not self.enabled:
+            return
+        last = getattr(self._local, "last", None)
+        now = time.perf_counter()
+        self._local.last = now
+        if last is not None:
+            self.record(phase, last, now)
+
+    def finish(self, name: str):
+        """Record the whole pass since start() under its own name"""
+        if not self.enabled:
+            return
+        begin = getattr(self._local, "begin", None)
+        if begin is not None:
+            self.record(name, begin, time.perf_counter())
+        self._local.begin = self._local.last = None
+
+    def record(self, phase: str, start: float, end: float):
+        event = (phase, start, end - start, threading.get_ident())
+        with self._lock:
+            samples = self.samples.get(phase)
+            if samples is None:
+                samples = self.samples.setdefault(phase, deque(maxlen=self.window))
+            samples.append(end - start)
+            self.trace.append(event)
+
+    def count(self, name: str, value):
+        if self.enabled:
+            with self._lock:
+                self.counts[name] = value
+
+    def latest_counts(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def percentiles(self, quantiles=(50, 95, 99)) -> dict:
+        """Return {phase: {"p50": ms, ..., "mean": ms, "samples": n}}"""
+        with self._lock:
+            windows = {phase: list(samples) for phase, samples in self.samples.items()}
+        stats = {}
+        for phase, samples in windows.items():
+            values = np.fromiter(samples, dtype=np.float64) * 1000.0
+            if not len(values):
+                continue
+            row = {
+                f"p{q}": float(v)
+                for q, v in zip(quantiles, np.percentile(values, quantiles))
+            }
+            row["mean"] = float(values.mean())
+            row["samples"] = len(values)
+            stats[phase] = row
+        return stats
+
+    def export_trace(self, path: str):
+        """Write the event log in Chrome trace format (chrome://tracing, Perfetto)"""
+        with self._lock:
+            trace = list(self.trace)
+        events = [
+            {
+                "name": phase,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": 0,
+                "tid": thread,
+            }
+            for phase, start, duration, thread in trace
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.counts.clear()
+            self.trace.clear()
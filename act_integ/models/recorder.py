@@ -0,0 +1,340 @@
+# models/recorder.py
+import json
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from objects.traffic_light import LightState
+
+MANIFEST = "manifest.json"
+
+VEHICLE = 0
+PEDESTRIAN = 1
+
+# One row per agent per sample
+AGENT_COLUMNS = {
+    "step": np.int32,
+    "kind": np.int8,  # VEHICLE or PEDESTRIAN
+    "id": np.int64,
+    "x": np.float32,
+    "z": np.float32,
+    "rotation": np.float32,  # Yaw in degrees
+    "speed": np.float32,
+    "scale": np.float32,  # Drawn size
+    "blocked": np.bool_,  # Did not move this step
+    "waiting": np.bool_,  # Held at a stop block or waiting to cross
+    "light": np.int16,  # Index into the model's traffic lights, -1 for none
+    "red": np.uint8,
+    "green": np.uint8,
+    "blue": np.uint8,
+}
+
+# One row per sample; rows of a sample are agent rows first_row onwards
+FRAME_COLUMNS = {
+    "step": np.int32,
+    "time": np.float64,
+    "first_row": np.int64,
+    "vehicles": np.int32,
+    "pedestrians": np.int32,
+}
+
+LIGHT_STATES = list(LightState)
+
+
+class _Chunk:
+    """Preallocated columns for a fixed number of agent and frame rows"""
+
+    def __init__(self, rows: int, frames: int, lights: int):
+        self.agents = {
+            name: np.empty(rows, dtype) for name, dtype in AGENT_COLUMNS.items()
+        }
+        self.frames = {
+            name: np.empty(frames, dtype) for name, dtype in FRAME_COLUMNS.items()
+        }
+        self.frames["lights"] = np.empty((frames, lights), np.int8)
+        self.rows = 0
+        self.frame_rows = 0
+        self.index = 0
+
+    @property
+    def row_capacity(self) -> int:
+        return len(self.agents["step"])
+
+    @property
+    def frame_capacity(self) -> int:
+        return len(self.frames["step"])
+
+    def columns(self) -> dict:
+        columns = {f"agent_{k}": v[: self.rows] for k, v in self.agents.items()}
+        columns.update(
+            {f"frame_{k}": v[: self.frame_rows] for k, v in self.frames.items()}
+        )
+        return columns
+
+
+class TrajectoryRecorder:
+    """Samples per-agent state every `every` steps into columnar chunks.
+
+    A fixed pool of preallocated chunks is filled in place; full chunks are
+    compressed and written by a background thread, then handed back. When
+    the writer falls behind, sampling waits for a free chunk, so memory
+    stays at `buffers` chunks however long the run is. The output
+    directory holds numbered chunk files and a manifest.json describing
+    the run.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        every: int = 10,
+        chunk_rows: int = 1 << 16,
+        chunk_frames: int = 4096,
+        buffers: int = 4,
+        format: str = "npz",
+    ):
+        if every < 1:
+            raise ValueError("Sampling interval must be at least one step")
+        if format not in ("npz", "parquet"):
+            raise ValueError(f"Unknown trajectory format: {format}")
+        if format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Parquet output needs pyarrow installed")
+        self.directory = directory
+        self.every = every
+        self.chunk_rows = chunk_rows
+        self.chunk_frames = chunk_frames
+        self.buffers = buffers
+        self.format = format
+
+        self.meta = None
+        self.chunks = []  # File names, in order
+        self.rows = 0
+        self.samples = 0
+        self.sample_seconds = 0.0
+        self.stall_seconds = 0.0
+        self._started = None
+        self._chunk: Optional[_Chunk] = None
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        self._writer = None
+        self._error = None
+        self._closed = False
+
+    def _describe(self, model=None) -> dict:
+        lights = model.traffic_lights if model is not None else []
+        return {
+            "dt": model.clock.dt if model is not None else None,
+            "every": self.every,
+            "format": self.format,
+            "lights": [light.name for light in lights],
+            "light_states": [state.name for state in LIGHT_STATES],
+            "kinds": {"vehicle": VEHICLE, "pedestrian": PEDESTRIAN},
+        }
+
+    def _open(self, model):
+        os.makedirs(self.directory, exist_ok=True)
+        lights = len(model.traffic_lights)
+        for _ in range(self.buffers):
+            self._free.put(_Chunk(self.chunk_rows, self.chunk_frames, lights))
+        self._writer = threading.Thread(
+            target=self._write_chunks, name="trajectory-writer", daemon=True
+        )
+        self._writer.start()
+        self._started = time.perf_counter()
+        self._chunk = self._next_chunk()
+
+    def sample(self, model):
+        """Record the model if this step is due; call after each step"""
+        if self.meta is None:
+            self.meta = self._describe(model)
+        if model.steps_run % self.every:
+            return
+        start = time.perf_counter()
+        if self._chunk is None:
+            self._open(model)
+        if self._error is not None:
+            raise RuntimeError("Trajectory writer failed") from self._error
+
+        light_index = {id(light): i for i, light in enumerate(model.traffic_lights)}
+        vehicles = self._vehicle_rows(model, light_index)
+        pedestrians = self._pedestrian_rows(model)
+
+        chunk = self._chunk
+        if chunk.frame_rows == chunk.frame_capacity:
+            chunk = self._rotate()
+        frame = chunk.frame_rows
+        chunk.frames["step"][frame] = model.steps_run
+        chunk.frames["time"][frame] = model.clock.now
+        chunk.frames["first_row"][frame] = self.rows
+        chunk.frames["vehicles"][frame] = len(vehicles["id"])
+        chunk.frames["pedestrians"][frame] = len(pedestrians["id"])
+        chunk.frames["lights"][frame] = [
+            LIGHT_STATES.index(light.current_state) for light in model.traffic_lights
+        ]
+        chunk.frame_rows += 1
+
+        for kind, rows in ((VEHICLE, vehicles), (PEDESTRIAN, pedestrians)):
+            rows["step"] = model.steps_run
+            rows["kind"] = kind
+            self._append(rows, len(rows["id"]))
+
+        self.samples += 1
+        self.sample_seconds += time.perf_counter() - start
+
+    def _vehicle_rows(self, model, light_index) -> dict:
+        store = model.vehicle_state
+        slots = np.flatnonzero(store.active[: store.size])
+        agents = [store.agents[slot] for slot in slots.tolist()]
+        lights = np.full(len(agents), -1, np.int16)
+        for i, vehicle in enumerate(agents):
+            light = model.approaches.light_ahead(*model.lane_index.coordinates(vehicle))
+            if light is not None:
+                lights[i] = light_index[id(light)]
+        rows = self._store_rows(store, slots)
+        rows["rotation"] = [vehicle.rotation for vehicle in agents]
+        rows["scale"] = [vehicle.scale for vehicle in agents]
+        rows["waiting"] = [vehicle.waiting_at_light for vehicle in agents]
+        rows["light"] = lights
+        rows["red"] = rows["green"] = rows["blue"] = 255
+        return rows
+
+    def _pedestrian_rows(self, model) -> dict:
+        store = model.pedestrian_state
+        slots = np.flatnonzero(store.active[: store.size])
+        agents = [store.agents[slot] for slot in slots.tolist()]
+        colors = np.array(
+            [pedestrian.color for pedestrian in agents], np.float32
+        ).reshape(-1, 3)
+        colors = np.round(colors * 255).astype(np.uint8)
+        rows = self._store_rows(store, slots)
+        rows["rotation"] = 0.0
+        rows["scale"] = [pedestrian.size for pedestrian in agents]
+        rows["waiting"] = [pedestrian.waiting_to_cross for pedestrian in agents]
+        rows["light"] = -1
+        rows["red"], rows["green"], rows["blue"] = colors.T
+        return rows
+
+    @staticmethod
+    def _store_rows(store, slots) -> dict:
+        return {
+            "id": store.ids[slots],
+            "x": store.positions[slots, 0],
+            "z": store.positions[slots, 2],
+            "speed": store.speeds[slots],
+            "blocked": store.blocked[slots],
+        }
+
+    def _append(self, rows: dict, count: int):
+        """Copy `count` rows into the chunk pool, spilling into new chunks"""
+        done = 0
+        while done < count:
+            chunk = self._chunk
+            if chunk.rows == chunk.row_capacity:
+                chunk = self._rotate()
+            take = min(count - done, chunk.row_capacity - chunk.rows)
+            target = slice(chunk.rows, chunk.rows + take)
+            for name, column in chunk.agents.items():
+                value = rows[name]
+                column[target] = value[done : done + take] if np.ndim(value) else value
+            chunk.rows += take
+            done += take
+        self.rows += count
+
+    def _next_chunk(self) -> _Chunk:
+        start = time.perf_counter()
+        chunk = self._free.get()
+        self.stall_seconds += time.perf_counter() - start
+        chunk.rows = chunk.frame_rows = 0
+        chunk.index = len(self.chunks)
+        self.chunks.append(f"chunk_{chunk.index:06d}.{self.format}")
+        return chunk
+
+    def _rotate(self) -> _Chunk:
+        self._filled.put(self._chunk)
+        self._chunk = self._next_chunk()
+        return self._chunk
+
+    def _write_chunks(self):
+        while True:
+            chunk = self._filled.get()
+            if chunk is None:
+                break
+            try:
+                self._write(chunk)
+            except Exception as error:  # Surfaced on the next sample or close
+                self._error = error
+            self._free.put(chunk)
+
+    def _write(self, chunk: _Chunk):
+        path = os.path.join(self.directory, self.chunks[chunk.index])
+        columns = chunk.columns()
+        if self.format == "npz":
+            np.savez_compressed(path, **columns)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Parquet tables are flat and of one length: agent rows and frame
+        # rows go to two files, per-light states to one column each
+        agents = {k[6:]: v for k, v in columns.items() if k.startswith("agent_")}
+        frames = {
+            k[6:]: v
+            for k, v in columns.items()
+            if k.startswith("frame_") and k != "frame_lights"
+        }
+        for i, name in enumerate(self.meta["lights"]):
+            frames[f"light_{name}"] = columns["frame_lights"][:, i]
+        pq.write_table(pa.table(agents), path, compression="zstd")
+        pq.write_table(
+            pa.table(frames),
+            path[: -len(".parquet")] + ".frames.parquet",
+            compression="zstd",
+        )
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "samples": self.samples,
+            "rows": self.rows,
+            "chunks": len(self.chunks),
+            "mean_sample_ms": (
+                1000 * self.sample_seconds / self.samples if self.samples else 0.0
+            ),
+            "stall_s": self.stall_seconds,
+            # Share of the wall time since the first sample spent recording
+            "overhead": self.sample_seconds / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def close(self):
+        """Write the last partial chunk and the manifest, then stop the writer
+
+        A run too short to be sampled still gets a manifest, listing no
+        chunks, so readers report an empty recording.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._chunk is not None:
+            if self._chunk.rows or self._chunk.frame_rows:
+                self._filled.put(self._chunk)
+            else:
+                self.chunks.pop()
+            self._chunk = None
+            self._filled.put(None)
+            self._writer.join()
+
+        os.makedirs(self.directory, exist_ok=True)
+        meta = self.meta if self.meta is not None else self._describe()
+        manifest = dict(meta, chunks=self.chunks, rows=self.rows)
+        manifest["samples"] = self.samples
+        with open(os.path.join(self.directory, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        if self._error is not None:
+            raise RuntimeError("Trajectory writer failed") from self._error
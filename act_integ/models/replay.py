@@ -0,0 +1,274 @@
+# models/replay.py
+import dataclasses
+import json
+import os
+from typing import Optional
+
+import numpy as np
+
+from models.recorder import AGENT_COLUMNS, FRAME_COLUMNS, LIGHT_STATES, MANIFEST
+from models.snapshot import AgentFrame, SceneSnapshot, interpolate
+from objects.traffic_light import LightState
+
+COLUMN_DIRECTORY = "columns"  # Memory-mappable copy of the chunks
+REPLAY_SPEEDS = (0.125, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+
+def _read_chunk(path: str, format: str, lights: list) -> dict:
+    """Columns of one chunk keyed as in the .npz files"""
+    if format == "npz":
+        with np.load(path) as chunk:
+            return {name: chunk[name] for name in chunk.files}
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet trajectories needs pyarrow installed")
+    agents = pq.read_table(path).to_pydict()
+    frames = pq.read_table(path[: -len(".parquet")] + ".frames.parquet").to_pydict()
+    columns = {f"agent_{name}": np.asarray(agents[name]) for name in AGENT_COLUMNS}
+    columns.update(
+        {f"frame_{name}": np.asarray(frames[name]) for name in FRAME_COLUMNS}
+    )
+    columns["frame_lights"] = np.stack(
+        [np.asarray(frames[f"light_{name}"], np.int8) for name in lights], axis=1
+    ).reshape(-1, len(lights))
+    return columns
+
+
+class Trajectory:
+    """Random access to a run written by TrajectoryRecorder.
+
+    On first open the chunks are copied, one at a time, into one .npy file
+    per column under ``columns/``; later opens map those files read-only,
+    so only the rows actually drawn are paged in. The frame table is the
+    keyframe index: every sample is complete, starts at a known agent row,
+    and is found by binary search on its step or time.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.meta = json.load(f)
+        self.directory = directory
+        self.dt = self.meta["dt"]
+        self.light_names = self.meta["lights"]
+        columns = os.path.join(directory, COLUMN_DIRECTORY)
+        if not os.path.exists(os.path.join(columns, "frame_step.npy")):
+            self._build_columns(columns)
+        self.columns = {
+            name[: -len(".npy")]: np.load(os.path.join(columns, name), mmap_mode="r")
+            for name in os.listdir(columns)
+            if name.endswith(".npy")
+        }
+        self.steps = self.columns["frame_step"]
+        self.times = self.columns["frame_time"]
+        self.first_rows = self.columns["frame_first_row"]
+        self.vehicle_counts = self.columns["frame_vehicles"]
+        self.pedestrian_counts = self.columns["frame_pedestrians"]
+        if not len(self.steps):
+            raise ValueError(f"{directory}: the recording holds no samples")
+
+    def _build_columns(self, columns: str):
+        rows, samples = self.meta["rows"], self.meta["samples"]
+        lights = len(self.light_names)
+        os.makedirs(columns, exist_ok=True)
+        shapes = {
+            f"agent_{name}": ((rows,), dtype) for name, dtype in AGENT_COLUMNS.items()
+        }
+        shapes.update(
+            {
+                f"frame_{name}": ((samples,), dtype)
+                for name, dtype in FRAME_COLUMNS.items()
+            }
+        )
+        shapes["frame_lights"] = ((samples, lights), np.int8)
+        # frame_step is written last, so an interrupted build is redone
+        names = sorted(shapes, key=lambda name: name == "frame_step")
+        outputs = {
+            name: np.lib.format.open_memmap(
+                os.path.join(columns, f"{name}.tmp.npy"),
+                mode="w+",
+                dtype=shapes[name][1],
+                shape=shapes[name][0],
+            )
+            for name in names
+        }
+
+        offsets = {"agent": 0, "frame": 0}
+        for chunk_name in self.meta["chunks"]:
+            chunk = _read_chunk(
+                os.path.join(self.directory, chunk_name),
+                self.meta["format"],
+                self.light_names,
+            )
+            counts = {
+                table: len(chunk[f"{table}_step"]) for table in ("agent", "frame")
+            }
+            for name, output in outputs.items():
+                table = name.split("_")[0]
+                start = offsets[table]
+                output[start : start + counts[table]] = chunk[name]
+            for table, count in counts.items():
+                offsets[table] += count
+        if offsets["agent"] != rows or offsets["frame"] != samples:
+            raise ValueError(f"{self.directory}: chunks do not match the manifest")
+
+        for name in names:
+            outputs[name].flush()
+            del outputs[name]
+            os.replace(
+                os.path.join(columns, f"{name}.tmp.npy"),
+                os.path.join(columns, f"{name}.npy"),
+            )
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1])
+
+    def index_at(self, time: float) -> int:
+        """Last sample taken at or before `time`, clamped to the recording"""
+        index = int(np.searchsorted(self.times, time, side="right")) - 1
+        return min(max(index, 0), len(self.steps) - 1)
+
+    def index_of_step(self, step: int) -> int:
+        """Last sample taken at or before model step `step`"""
+        index = int(np.searchsorted(self.steps, step, side="right")) - 1
+        return min(max(index, 0), len(self.steps) - 1)
+
+    def _agent_frame(self, start: int, stop: int, rotation: bool) -> AgentFrame:
+        columns = self.columns
+        rows = slice(start, stop)
+        count = stop - start
+        positions = np.zeros((count, 3), np.float32)
+        positions[:, 0] = columns["agent_x"][rows]
+        positions[:, 2] = columns["agent_z"][rows]
+        colors = np.stack(
+            [
+                columns["agent_red"][rows],
+                columns["agent_green"][rows],
+                columns["agent_blue"][rows],
+            ],
+            axis=1,
+        ).astype(np.float32)
+        colors /= 255.0
+        frame = AgentFrame(
+            ids=np.array(columns["agent_id"][rows]),
+            positions=positions,
+            rotations=(
+                np.array(columns["agent_rotation"][rows])
+                if rotation
+                else np.zeros(count, np.float32)
+            ),
+            scales=np.array(columns["agent_scale"][rows]),
+            colors=colors,
+        )
+        for array in (frame.ids, frame.positions, frame.rotations, frame.scales):
+            array.flags.writeable = False
+        colors.flags.writeable = False
+        return frame
+
+    def snapshot(self, index: int, stop_blocks=()) -> SceneSnapshot:
+        """Rebuild the SceneSnapshot of one sample
+
+        Stop blocks are active while the light they follow is red or
+        yellow, as in StopBlock.update; pass the blocks of a TrafficModel
+        to get their states in the same order.
+        """
+        first = int(self.first_rows[index])
+        vehicles = int(self.vehicle_counts[index])
+        pedestrians = int(self.pedestrian_counts[index])
+        light_states = tuple(
+            LIGHT_STATES[state] for state in self.columns["frame_lights"][index]
+        )
+        states = dict(zip(self.light_names, light_states))
+        return SceneSnapshot(
+            step=int(self.steps[index]),
+            time=float(self.times[index]),
+            published_at=0.0,
+            vehicles=self._agent_frame(first, first + vehicles, rotation=True),
+            pedestrians=self._agent_frame(
+                first + vehicles, first + vehicles + pedestrians, rotation=False
+            ),
+            light_states=light_states,
+            block_active=tuple(
+                block.light is not None
+                and states[block.light.name] in (LightState.RED, LightState.YELLOW)
+                for block in stop_blocks
+            ),
+        )
+
+
+class ReplayPlayer:
+    """Playhead over a Trajectory with pause, seek and variable speed.
+
+    The playhead moves in simulated seconds by the wall time passed to
+    ``advance``; each frame is blended from the two samples around it, so
+    playback is smooth at any speed and sampling interval. The last two
+    samples are kept, so a frame costs two row slices at most however
+    many agents the run had.
+    """
+
+    def __init__(self, trajectory: Trajectory, stop_blocks=(), speed: float = 1.0):
+        self.trajectory = trajectory
+        self.stop_blocks = stop_blocks
+        self.speed = speed
+        self.paused = False
+        self.time = float(trajectory.times[0])
+        self._cache = {}  # Sample index -> SceneSnapshot
+
+    def advance(self, wall_seconds: float):
+        if not self.paused:
+            self.seek(self.time + wall_seconds * self.speed)
+
+    def seek(self, time: float):
+        self.time = min(
+            max(time, float(self.trajectory.times[0])), self.trajectory.duration
+        )
+
+    def scrub(self, seconds: float):
+        """Jump forwards (or backwards when negative) in simulated seconds"""
+        self.seek(self.time + seconds)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    def faster(self):
+        self.speed = next((s for s in REPLAY_SPEEDS if s > self.speed), self.speed)
+
+    def slower(self):
+        self.speed = next(
+            (s for s in reversed(REPLAY_SPEEDS) if s < self.speed), self.speed
+        )
+
+    def _sample(self, index: int) -> SceneSnapshot:
+        snapshot = self._cache.get(index)
+        if snapshot is None:
+            snapshot = self.trajectory.snapshot(index, self.stop_blocks)
+            self._cache = {i: s for i, s in self._cache.items() if abs(i - index) <= 1}
+            self._cache[index] = snapshot
+        return snapshot
+
+    def snapshot(self, time: Optional[float] = None) -> SceneSnapshot:
+        """Interpolated scene at the playhead (or at `time`)
+
+        Agent poses are blended; signals and stop blocks keep the state of
+        the last sample taken, so lights change when the recording says
+        they did rather than up to a sampling interval early.
+        """
+        time = self.time if time is None else time
+        trajectory = self.trajectory
+        index = trajectory.index_at(time)
+        if index + 1 == len(trajectory):
+            return self._sample(index)
+        previous, current = self._sample(index), self._sample(index + 1)
+        alpha = (time - previous.time) / (current.time - previous.time)
+        if alpha >= 1.0:
+            return current
+        return dataclasses.replace(
+            interpolate(previous, current, alpha),
+            step=previous.step,
+            light_states=previous.light_states,
+            block_active=previous.block_active,
+        )
@@ -0,0 +1,48 @@
+# models/scheduler.py
+from typing import Dict, List
+
+
+class WakeScheduler:
+    """Parks blocked agents until an event that could unblock them fires.
+
+    An event is identified by any hashable object, typically the thing the
+    agent is waiting for: the stop block it is held at or the vehicle it is
+    queued behind. Parked agents are skipped by the model until the event
+    is fired, which wakes all of them at once.
+    """
+
+    def __init__(self):
+        self._waiting: Dict[object, List] = {}
+        self._parked: Dict[object, object] = {}  # agent -> event
+
+    def __len__(self):
+        return len(self._parked)
+
+    def __contains__(self, agent):
+        return agent in self._parked
+
+    def park(self, agent, event):
+        """Skip `agent` until `event` fires"""
+        if agent in self._parked:
+            self.discard(agent)
+        self._parked[agent] = event
+        self._waiting.setdefault(event, []).append(agent)
+
+    def fire(self, event) -> List:
+        """Wake every agent waiting on `event` and return them"""
+        agents = self._waiting.pop(event, None)
+        if not agents:
+            return []
+        for agent in agents:
+            del self._parked[agent]
+        return agents
+
+    def discard(self, agent):
+        """Forget an agent, e.g. when it leaves the simulation"""
+        event = self._parked.pop(agent, None)
+        if event is None:
+            return
+        waiting = self._waiting[event]
+        waiting.remove(agent)
+        if not waiting:
+            del self._waiting[event]
@@ -0,0 +1,60 @@
+# models/simulation_thread.py
+import threading
+import time
+
+from models.snapshot import SnapshotBuffer, take_snapshot
+
+
+class SimulationThread(threading.Thread):
+    """Steps a TrafficModel in real time on its own thread.
+
+    After every batch of steps an immutable snapshot is published to the
+    buffer, so the renderer never reads the live model and neither side
+    waits on the other. An exception in the model ends the thread and is
+    kept for the render loop to raise through check().
+    """
+
+    def __init__(
+        self, model, buffer: SnapshotBuffer, speed: float = 1.0, max_catch_up: int = 5
+    ):
+        super().__init__(name="simulation", daemon=True)
+        if speed <= 0:
+            raise ValueError(f"speed must be positive, got {speed}")
+        self.model = model
+        self.buffer = buffer
+        self.speed = speed  # Simulated seconds per wall-clock second
+        self.max_catch_up = max_catch_up  # Steps per wake before dropping time
+        self._stop_event = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            self._run()
+        except Exception as error:
+            self.error = error
+
+    def check(self):
+        """Raise the model's exception if the thread died from one"""
+        if self.error is not None:
+            raise RuntimeError("Simulation thread failed") from self.error
+
+    def _run(self):
+        self.buffer.publish(take_snapshot(self.model))
+        next_step = time.perf_counter()
+        while not self._stop_event.is_set():
+            step_wall = self.model.clock.dt / self.speed
+            now = time.perf_counter()
+            steps = 0
+            while now >= next_step and steps < self.max_catch_up:
+                self.model.step()
+                next_step += step_wall
+                steps += 1
+            if now >= next_step:
+                next_step = now  # Too far behind, skip instead of spiraling
+            if steps:
+                self.buffer.publish(take_snapshot(self.model))
+            self._stop_event.wait(max(next_step - time.perf_counter(), 0.0))
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
@@ -0,0 +1,149 @@
+# models/snapshot.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AgentFrame:
+    """Read-only per-agent arrays for one kind of agent"""
+
+    ids: np.ndarray  # int64, in model order
+    positions: np.ndarray  # (n, 3) float32
+    rotations: np.ndarray  # yaw in degrees
+    scales: np.ndarray
+    colors: np.ndarray  # (n, 3) float32
+
+    def __len__(self):
+        return len(self.ids)
+
+
+@dataclass(frozen=True)
+class SceneSnapshot:
+    """Everything the renderer needs from one model step.
+
+    Snapshots never change after creation, so the simulation thread can
+    publish them while the render thread is still drawing an older one.
+    """
+
+    step: int
+    time: float  # Simulated seconds
+    published_at: float  # time.perf_counter() when taken
+    vehicles: AgentFrame
+    pedestrians: AgentFrame
+    light_states: Tuple  # LightState per model.traffic_lights entry
+    block_active: Tuple[bool, ...]  # Per model.stop_blocks entry
+
+
+def _frozen(array, dtype) -> np.ndarray:
+    array = np.array(array, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+def _agent_frame(store, agents, rotations, scales, colors) -> AgentFrame:
+    slots = np.fromiter((agent.slot for agent in agents), np.int64, len(agents))
+    return AgentFrame(
+        ids=_frozen([agent.id for agent in agents], np.int64),
+        positions=_frozen(store.positions[slots], np.float32).reshape(-1, 3),
+        rotations=_frozen(rotations, np.float32),
+        scales=_frozen(scales, np.float32),
+        colors=_frozen(colors, np.float32).reshape(-1, 3),
+    )
+
+
+def take_snapshot(model) -> SceneSnapshot:
+    """Copy the drawable state of a TrafficModel into a SceneSnapshot"""
+    vehicles = model.vehicles
+    pedestrians = model.pedestrians
+    return SceneSnapshot(
+        step=model.steps_run,
+        time=model.clock.now,
+        published_at=time.perf_counter(),
+        vehicles=_agent_frame(
+            model.vehicle_state,
+            vehicles,
+            [vehicle.rotation for vehicle in vehicles],
+            [vehicle.scale for vehicle in vehicles],
+            np.ones((len(vehicles), 3)),
+        ),
+        pedestrians=_agent_frame(
+            model.pedestrian_state,
+            pedestrians,
+            np.zeros(len(pedestrians)),
+            [pedestrian.size for pedestrian in pedestrians],
+            [pedestrian.color for pedestrian in pedestrians],
+        ),
+        light_states=tuple(light.current_state for light in model.traffic_lights),
+        block_active=tuple(block.active for block in model.stop_blocks),
+    )
+
+
+def _blend_frame(previous: AgentFrame, current: AgentFrame, alpha: float):
+    # Agents that only exist in the newer frame are drawn where they are
+    _, mine, theirs = np.intersect1d(
+        current.ids, previous.ids, assume_unique=True, return_indices=True
+    )
+    positions = current.positions.copy()
+    positions[mine] = previous.positions[theirs] + alpha * (
+        current.positions[mine] - previous.positions[theirs]
+    )
+    rotations = current.rotations.copy()
+    turn = (
+        current.rotations[mine] - previous.rotations[theirs] + 180.0
+    ) % 360.0 - 180.0
+    rotations[mine] = current.rotations[mine] - (1.0 - alpha) * turn
+    return AgentFrame(
+        ids=current.ids,
+        positions=_frozen(positions, np.float32),
+        rotations=_frozen(rotations, np.float32),
+        scales=current.scales,
+        colors=current.colors,
+    )
+
+
+def interpolate(
+    previous: Optional[SceneSnapshot], current: SceneSnapshot, alpha: float
+) -> SceneSnapshot:
+    """Blend agent poses between two snapshots, alpha 0 = previous, 1 = current
+
+    Discrete state (signals, stop blocks) always comes from the newer one.
+    """
+    if previous is None or alpha >= 1.0:
+        return current
+    alpha = max(alpha, 0.0)
+    return SceneSnapshot(
+        step=current.step,
+        time=previous.time + alpha * (current.time - previous.time),
+        published_at=current.published_at,
+        vehicles=_blend_frame(previous.vehicles, current.vehicles, alpha),
+        pedestrians=_blend_frame(previous.pedestrians, current.pedestrians, alpha),
+        light_states=current.light_states,
+        block_active=current.block_active,
+    )
+
+
+class SnapshotBuffer:
+    """Latest two published snapshots, swapped under a short lock.
+
+    Together with the snapshot the writer is building, this behaves as a
+    triple buffer: the simulation never waits for the renderer and the
+    renderer always has a complete pair to interpolate between.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous: Optional[SceneSnapshot] = None
+        self._latest: Optional[SceneSnapshot] = None
+
+    def publish(self, snapshot: SceneSnapshot):
+        with self._lock:
+            self._previous, self._latest = self._latest, snapshot
+
+    def pair(self):
+        """Return (previous, latest); either may be None early on"""
+        with self._lock:
+            return self._previous, self._latest
@@ -0,0 +1,73 @@
+# models/spatial.py
+import math
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform grid over the city plane for proximity queries.
+
+    Agents are bucketed by the cell containing their (x, z) position, so a
+    query only visits the cells overlapping its search square instead of
+    every agent in the model.
+    """
+
+    def __init__(self, cell_size: float = 20.0):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _cell(self, x: float, z: float):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def clear(self):
+        self.cells.clear()
+        self._count = 0
+
+    def insert(self, item, x: float, z: float):
+        self.cells[self._cell(x, z)].append(item)
+        self._count += 1
+
+    def rebuild(self, agents: Iterable):
+        """Re-index every agent at its current position"""
+        self.clear()
+        for agent in agents:
+            self.insert(agent, agent.position[0], agent.position[2])
+
+    def rebuild_from_store(self, store):
+        """Re-index every active agent of an AgentStateStore in bulk"""
+        self.clear()
+        slots = np.flatnonzero(store.active[: store.size])
+        if len(slots) == 0:
+            return
+        positions = store.positions[slots]
+        cx = np.floor(positions[:, 0] / self.cell_size).astype(np.int64)
+        cz = np.floor(positions[:, 2] / self.cell_size).astype(np.int64)
+        cells = self.cells
+        agents = store.agents
+        for slot, key in zip(slots.tolist(), zip(cx.tolist(), cz.tolist())):
+            cells[key].append(agents[slot])
+        self._count = len(slots)
+
+    def query(self, x: float, z: float, radius: float) -> Iterator:
+        """Yield agents in the cells overlapping the square around (x, z).
+
+        Candidates may lie slightly outside the radius; callers apply their
+        own exact test.
+        """
+        cs = self.cell_size
+        x0, x1 = math.floor((x - radius) / cs), math.floor((x + radius) / cs)
+        z0, z1 = math.floor((z - radius) / cs), math.floor((z + radius) / cs)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cz in range(z0, z1 + 1):
+                bucket = cells.get((cx, cz))
+                if bucket:
+                    yield from bucket
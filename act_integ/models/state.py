@@ -0,0 +1,192 @@
+# models/state.py
+from typing import List
+
+import numpy as np
+
+
+class AgentStateStore:
+    """Structure-of-arrays storage for the kinematic state of many agents.
+
+    Each agent owns one slot (row) holding its position, speed, current
+    waypoint and flags. ``advance`` moves every active agent towards its
+    waypoint in a single NumPy pass, so per-agent Python code only decides
+    *whether* an agent may move, not how.
+    """
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(int(capacity), 1)
+        self.positions = np.zeros((capacity, 3))
+        self.targets = np.zeros((capacity, 3))
+        self.speeds = np.zeros(capacity)
+        self.waypoint_index = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.has_target = np.zeros(capacity, dtype=bool)
+        self.blocked = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)  # agentpy ids, for output
+        self.agents: List = [None] * capacity
+        self.size = 0  # High-water mark of used slots
+        self._free: List[int] = []
+
+    def __len__(self):
+        return self.size - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.agents)
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name in (
+            "positions",
+            "targets",
+            "speeds",
+            "waypoint_index",
+            "active",
+            "has_target",
+            "blocked",
+            "ids",
+        ):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        self.agents.extend([None] * (capacity - len(self.agents)))
+
+    def allocate(self, agent) -> int:
+        """Reserve a slot for an agent and return its index"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            slot = self.size
+            self.size += 1
+
+        self.positions[slot] = 0.0
+        self.targets[slot] = 0.0
+        self.speeds[slot] = 0.0
+        self.waypoint_index[slot] = 0
+        self.active[slot] = True
+        self.has_target[slot] = False
+        self.blocked[slot] = False
+        self.ids[slot] = agent.id
+        self.agents[slot] = agent
+        return slot
+
+    def release(self, slot: int):
+        """Return a slot to the free list"""
+        if not self.active[slot]:
+            return
+        self.active[slot] = False
+        self.has_target[slot] = False
+        self.agents[slot] = None
+        self._free.append(slot)
+
+    def advance(self, dt: float) -> np.ndarray:
+        """Move every active, unblocked agent towards its current waypoint.
+
+        Agents closer to their waypoint than one step snap onto it. Returns
+        the slots that reached their waypoint during this pass.
+        """
+        n = self.size
+        slots = np.flatnonzero(
+            self.active[:n] & self.has_target[:n] & ~self.blocked[:n]
+        )
+        if len(slots) == 0:
+            return slots
+
+        positions = self.positions[slots]
+        targets = self.targets[slots]
+        dx = targets[:, 0] - positions[:, 0]
+        dz = targets[:, 2] - positions[:, 2]
+        distance = np.sqrt(dx * dx + dz * dz)
+        step = self.speeds[slots] * dt
+
+        arrived = distance < step
+        moving = ~arrived
+        positions[arrived] = targets[arrived]
+        positions[moving, 0] += (dx[moving] / distance[moving]) * step[moving]
+        positions[moving, 2] += (dz[moving] / distance[moving]) * step[moving]
+        self.positions[slots] = positions
+
+        return slots[arrived]
+
+    def count_in_box(
+        self, x_min: float, x_max: float, z_min: float, z_max: float
+    ) -> int:
+        """Number of active agents inside an axis-aligned box on the ground"""
+        n = self.size
+        x = self.positions[:n, 0]
+        z = self.positions[:n, 2]
+        inside = (x >= x_min) & (x <= x_max) & (z >= z_min) & (z <= z_max)
+        return int(np.count_nonzero(inside & self.active[:n]))
+
+
+class StateView:
+    """Mixin turning an agent into a thin view over an AgentStateStore row.
+
+    Subclasses call ``_bind_state`` first thing in ``setup``; afterwards
+    ``position``, ``speed``, ``path`` and ``blocked`` read and write the
+    store instead of Python attributes.
+    """
+
+    def _bind_state(self, store: AgentStateStore):
+        self._store = store
+        self._slot = store.allocate(self)
+        self._waypoints = []
+
+    def release_state(self):
+        self._store.release(self._slot)
+
+    @property
+    def slot(self) -> int:
+        return self._slot
+
+    @property
+    def position(self) -> np.ndarray:
+        return self._store.positions[self._slot]
+
+    @position.setter
+    def position(self, value):
+        self._store.positions[self._slot] = value
+
+    @property
+    def speed(self) -> float:
+        return float(self._store.speeds[self._slot])
+
+    @speed.setter
+    def speed(self, value):
+        self._store.speeds[self._slot] = value
+
+    @property
+    def blocked(self) -> bool:
+        return bool(self._store.blocked[self._slot])
+
+    @blocked.setter
+    def blocked(self, value):
+        self._store.blocked[self._slot] = value
+
+    @property
+    def path(self) -> list:
+        """Remaining waypoints, starting with the current target"""
+        return self._waypoints[self._store.waypoint_index[self._slot] :]
+
+    @path.setter
+    def path(self, waypoints):
+        self._waypoints = list(waypoints)
+        self._store.waypoint_index[self._slot] = 0
+        self._load_target()
+
+    def _load_target(self):
+        store, slot = self._store, self._slot
+        index = store.waypoint_index[slot]
+        if index < len(self._waypoints):
+            store.targets[slot] = self._waypoints[index]
+            store.has_target[slot] = True
+        else:
+            store.has_target[slot] = False
+
+    def reach_waypoint(self):
+        """Advance to the next waypoint after the store moved onto the current one"""
+        self._store.waypoint_index[self._slot] += 1
+        self._load_target()
@@ -1,53 +1,165 @@
 # traffic_model.py
+import math
 import random
-import time
+
 import agentpy as ap
+from models.arrivals import ArrivalScheduler, demand_profiles
+from models.clock import DEFAULT_DT, SimulationClock
+from environment.road_network import city_road_network
+from environment.sidewalk_network import ROADS, city_sidewalk_network
 from models.agents import VehicleAgent
+from objects.signal_plan import SignalController
 from objects.traffic_light import TrafficLight
 from objects.stop_block import StopBlock
-from models.pedestrian import PedestrianAgent
+from models.pedestrian import SPAWN_ZONES, PedestrianAgent
+from models.profiler import Profiler
+from models.intersections import ApproachIndex
+from models.lanes import LaneIndex
+from models.pool import AgentPool, swap_remove_finished
+from models.scheduler import WakeScheduler
+from models.spatial import SpatialHash
+from models.state import AgentStateStore
+
+# Default demand in agents per simulated second, shared by all entries
+VEHICLE_SPAWN_RATE = 1.2
+PEDESTRIAN_SPAWN_RATE = 0.6
+
+# Free road a new vehicle needs at its spawn point, along and across the lane
+VEHICLE_SPAWN_CLEARANCE = 20.0
+VEHICLE_SPAWN_HALF_WIDTH = 5.0
+
+# Pedestrians one sidewalk spawn zone holds before arrivals wait
+PEDESTRIAN_ZONE_CAPACITY = 3
+PEDESTRIAN_ZONE_DEPTH = 5.0
+
+# Distance between the sidewalk spots of a starting population
+PEDESTRIAN_START_SPACING = 5.0
+
+# How far ahead vehicles look for pedestrians in their path
+PEDESTRIAN_LOOKAHEAD = 20.0
 
 
 class TrafficModel(ap.Model):
-    def __init__(self, traffic_lights, **kwargs):
+    def __init__(
+        self, traffic_lights=None, clock=None, profiler=None, recorder=None, **kwargs
+    ):
         super().__init__(**kwargs)
+        # Seed from parameters so runs are reproducible without Model.run()
+        if "seed" in self.p:
+            self.random.seed(self.p.seed)
+        self.clock = clock or SimulationClock(self.p.get("dt", DEFAULT_DT))
+        self.profiler = profiler or Profiler(enabled=self.p.get("profile", False))
+        self.recorder = recorder  # Optional TrajectoryRecorder
         self.vehicles = ap.AgentList(self, 0, VehicleAgent)
         self.pedestrians = ap.AgentList(self, 0, PedestrianAgent)
         self.traffic_lights = []
         self.stop_blocks = []  # New list for stop blocks
-        self.start_time = time.time()
+        self.signals = SignalController()
+        self.lights_by_name = {}
+        self.vehicle_index = SpatialHash()
+        self.pedestrian_index = SpatialHash()
+        self.lane_index = LaneIndex()
+        self.scheduler = WakeScheduler()
+        self.vehicle_state = AgentStateStore()
+        self.pedestrian_state = AgentStateStore()
+        self.road_network = city_road_network()
+        self.sidewalk_network = city_sidewalk_network()
+        self.vehicle_pool = AgentPool(self, VehicleAgent)
+        self.pedestrian_pool = AgentPool(self, PedestrianAgent)
+
+        # Poisson arrivals per spawn point, each on its own random stream
+        # so changing one demand profile leaves the other arrivals alone
+        period = self.p.get("demand_period")
+        self.vehicle_arrivals = ArrivalScheduler(
+            demand_profiles(
+                self.p.get("vehicle_demand"),
+                list(self.road_network.entries),
+                VEHICLE_SPAWN_RATE,
+                period,
+            ),
+            random.Random(self.random.getrandbits(64)),
+        )
+        self.pedestrian_arrivals = ArrivalScheduler(
+            demand_profiles(
+                self.p.get("pedestrian_demand"),
+                list(SPAWN_ZONES),
+                PEDESTRIAN_SPAWN_RATE,
+                period,
+            ),
+            random.Random(self.random.getrandbits(64)),
+        )
+
+        # Counters for run summaries
+        self.steps_run = 0
+        self.vehicles_spawned = 0
+        self.vehicles_completed = 0
+        self.pedestrians_spawned = 0
+        self.pedestrians_completed = 0
+        self.vehicle_steps = 0
+        self.vehicle_stopped_steps = 0
         self._setup_traffic_lights()
         self._setup_stop_blocks()
 
+        # Optional starting population, e.g. for scaling benchmarks. Agents
+        # are spread along their routes; vehicles that find no room stay
+        # queued at their entry, pedestrians wait to spawn like arrivals.
+        taken = set()
+        for _ in range(self.p.get("vehicles", 0)):
+            self._spread_on_route(self.spawn_vehicle(), taken)
+        taken = set()
+        for _ in range(self.p.get("pedestrians", 0)):
+            self._spread_pedestrian(taken)
+
     def _setup_traffic_lights(self):
         """Create and configure all traffic lights including invisible ones"""
         # Visible traffic lights
         light_configs = [
             # North-South lights
-            {"pos": (95.0, 25.0), "dir": "NS", "visible": True},
-            {"pos": (-95.0, 30.0), "dir": "NS", "visible": True},
-            {"pos": (40.0, -25.0), "dir": "EW", "visible": True},
-            {"pos": (-40.0, -20.0), "dir": "EW", "visible": True},
+            {"id": "right_ns", "pos": (95.0, 25.0), "dir": "NS", "visible": True},
+            {"id": "left_ns", "pos": (-95.0, 30.0), "dir": "NS", "visible": True},
+            {"id": "right_ew", "pos": (40.0, -25.0), "dir": "EW", "visible": True},
+            {"id": "left_ew", "pos": (-40.0, -20.0), "dir": "EW", "visible": True},
             # Invisible intersection lights
-            {"pos": (-70.0, 0.0), "dir": "NS", "visible": False},  # Left intersection
-            {"pos": (70.0, 0.0), "dir": "NS", "visible": False},  # Right intersection
-            {"pos": (0.0, -20.0), "dir": "EW", "visible": False},  # Bottom intersection
-            {"pos": (0.0, 20.0), "dir": "EW", "visible": False},  # Top intersection
+            {
+                "id": "left_center",
+                "pos": (-70.0, 0.0),
+                "dir": "NS",
+                "visible": False,
+            },  # Left intersection
+            {
+                "id": "right_center",
+                "pos": (70.0, 0.0),
+                "dir": "NS",
+                "visible": False,
+            },  # Right intersection
+            {
+                "id": "bottom_center",
+                "pos": (0.0, -20.0),
+                "dir": "EW",
+                "visible": False,
+            },  # Bottom intersection
+            {
+                "id": "top_center",
+                "pos": (0.0, 20.0),
+                "dir": "EW",
+                "visible": False,
+            },  # Top intersection
         ]
 
         for config in light_configs:
-            light = TrafficLight()
+            light = TrafficLight(clock=self.clock)
+            light.name = config["id"]
             light.x, light.z = config["pos"]
             light.controls_direction = config["dir"]
             light.visible = config["visible"]
 
             # Set phase offset for East-West lights
             if config["dir"] == "EW":
-                light.phase_offset = (
-                    sum(light.timings.values()) / 2
-                )  # Offset by half cycle
+                light.phase_offset = light.plan.cycle_time / 2  # Offset by half cycle
 
             self.traffic_lights.append(light)
+            self.lights_by_name[light.name] = light
+            self.signals.add(light)
 
     def _setup_stop_blocks(self):
         """Create stop blocks for each intersection"""
@@ -65,24 +177,32 @@ class TrafficModel(ap.Model):
                 "width": ns_width,
                 "depth": ns_depth,
                 "dir": "NS",
+                "intersection": "left",
+                "light": "left_ns",
             },
             {
                 "pos": (-80, 30),  # Southbound - moved back 5 units
                 "width": ns_width,
                 "depth": ns_depth,
                 "dir": "NS",
+                "intersection": "left",
+                "light": "left_ns",
             },
             {
                 "pos": (-100, 10),  # Westbound - moved back 5 units
                 "width": ew_width,
                 "depth": ew_depth,
                 "dir": "EW",
+                "intersection": "left",
+                "light": "left_ew",
             },
             {
                 "pos": (-40, -10),  # Eastbound - moved back 5 units
                 "width": ew_width,
                 "depth": ew_depth,
                 "dir": "EW",
+                "intersection": "left",
+                "light": "left_ew",
             },
             # Right intersection
             {
@@ -90,24 +210,32 @@ class TrafficModel(ap.Model):
                 "width": ns_width,
                 "depth": ns_depth,
                 "dir": "NS",
+                "intersection": "right",
+                "light": "right_ns",
             },
             {
                 "pos": (60, 30),  # Southbound - moved back 5 units
                 "width": ns_width,
                 "depth": ns_depth,
                 "dir": "NS",
+                "intersection": "right",
+                "light": "right_ns",
             },
             {
                 "pos": (100, -10),  # Eastbound - moved back 5 units
                 "width": ew_width,
                 "depth": ew_depth,
                 "dir": "EW",
+                "intersection": "right",
+                "light": "right_ew",
             },
             {
                 "pos": (40, 10),  # Westbound - moved back 5 units
                 "width": ew_width,
                 "depth": ew_depth,
                 "dir": "EW",
+                "intersection": "right",
+                "light": "right_ew",
             },
         ]
 
@@ -119,78 +247,289 @@ class TrafficModel(ap.Model):
                 config["depth"],
                 config["dir"],
             )
+            # Explicit binding to the light controlling this approach
+            block.intersection = config["intersection"]
+            block.light = self.lights_by_name[config["light"]]
             self.stop_blocks.append(block)
 
+            # Stop blocks follow their light through change events, not polling
+            self.signals.subscribe(block.on_light_change, block.light)
+            self.signals.subscribe(self._wake_stop_block(block), block.light)
+
+        self.approaches = ApproachIndex(self.stop_blocks)
+
+    def _wake_stop_block(self, block):
+        """Build a light-change callback waking vehicles held at `block`"""
+
+        def wake(light, state, now):
+            self.scheduler.fire(block)
+
+        return wake
+
     def setup(self):
         """Configure the model with initial parameters."""
         self.vehicles = ap.AgentList(self, 0, VehicleAgent)
 
     def step(self):
         """Execute a single step in the simulation."""
-        # Update traffic lights based on master time
-        master_time = time.time() - self.start_time
-        for light in self.traffic_lights:
-            light.update(master_time)
-
-        # Update stop blocks based on corresponding traffic lights
-        for block in self.stop_blocks:
-            for light in self.traffic_lights:
-                if light.controls_direction == block.direction:
-                    block.update(light)
-                    break
+        profiler = self.profiler
+        profiler.start()
 
-        # Spawn new vehicles periodically
-        if random.random() < 0.02:
-            new_vehicle = VehicleAgent(self)
-            self.vehicles.append(new_vehicle)
+        # Apply due light changes; stop blocks are updated by the events
+        self.signals.update(self.clock.now)
+        profiler.lap("signals")
 
-        # Spawn new pedestrians periodically
-        if random.random() < 0.01:  # Lower spawn rate than vehicles
-            new_pedestrian = PedestrianAgent(self)
-            self.pedestrians.append(new_pedestrian)
+        # Spawn the arrivals that are due and find their spawn zone clear
+        now = self.clock.now
+        for entry in self.vehicle_arrivals.release(now, self._vehicle_entry_clear):
+            self.spawn_vehicle(entry)
+        for entry in self.pedestrian_arrivals.release(
+            now, self._pedestrian_entry_clear
+        ):
+            self.spawn_pedestrian(entry)
+        profiler.lap("spawn")
 
-        # Update pedestrians first
+        # Update pedestrians first, looking up nearby vehicles in the grid
+        self.vehicle_index.rebuild_from_store(self.vehicle_state)
+        profiler.lap("vehicle_index")
         for pedestrian in self.pedestrians:
-            pedestrian.move(self.traffic_lights, self.vehicles)
+            pedestrian.blocked = pedestrian.should_hold(
+                self.traffic_lights, self.vehicle_index
+            )
+        self._advance(self.pedestrian_state)
+        profiler.lap("pedestrians")
 
-        # Then update vehicles with pedestrian awareness
+        # Then update vehicles with pedestrian awareness. Vehicles parked at
+        # a red stop block or behind a stopped leader are skipped entirely.
+        self.pedestrian_index.rebuild_from_store(self.pedestrian_state)
+        profiler.lap("pedestrian_index")
+        moving = []
         for vehicle in self.vehicles:
+            self.vehicle_steps += 1
+            if vehicle in self.scheduler:
+                self.vehicle_stopped_steps += 1
+                continue
+
+            # A red stop block or a stopped leader parks the vehicle before
+            # any pedestrian lookup, so queues cost O(1) per vehicle
+            vehicle.collision_ahead = vehicle.is_collision_ahead(self.lane_index)
+            lane_key, progress = self.lane_index.coordinates(vehicle)
+            holding_block = self.approaches.holding_block(lane_key, progress)
+            vehicle.waiting_at_light = holding_block is not None
+            if holding_block is not None or vehicle.collision_ahead:
+                vehicle.blocked = True
+                self.vehicle_stopped_steps += 1
+                # Park until the light changes or the leader moves
+                if holding_block is not None:
+                    self.scheduler.park(vehicle, holding_block)
+                else:
+                    self.scheduler.park(vehicle, self.lane_index.leader(vehicle))
+                continue
+
             # Check for nearby pedestrians
             should_stop = False
-            for pedestrian in self.pedestrians:
-                if self._is_pedestrian_in_vehicle_path(vehicle, pedestrian):
+            nearby = self.pedestrian_index.query(
+                vehicle.position[0], vehicle.position[2], PEDESTRIAN_LOOKAHEAD
+            )
+            for pedestrian in nearby:
+                if self._is_pedestrian_in_vehicle_path(
+                    vehicle, pedestrian, PEDESTRIAN_LOOKAHEAD
+                ):
                     should_stop = True
                     break
 
-            # Regular vehicle updates
-            vehicle.collision_ahead = vehicle.is_collision_ahead(self.vehicles)
-            should_stop = should_stop or vehicle.collision_ahead
+            # A turn must not end on top of the queue of the lane it joins
+            # or cut in just ahead of the traffic on it, and a vehicle must
+            # not enter an intersection it cannot leave
+            turn_blocker = vehicle.turn_blocker(self.lane_index)
+            should_stop = (
+                should_stop
+                or turn_blocker is not None
+                or vehicle.must_yield_at_turn(self.lane_index)
+                or vehicle.box_blocked(self.lane_index)
+            )
 
-            for block in self.stop_blocks:
-                if block.active and block.is_colliding(vehicle.position):
-                    should_stop = True
-                    break
+            vehicle.blocked = should_stop
+            if not should_stop:
+                moving.append(vehicle)
+                continue
+            self.vehicle_stopped_steps += 1
 
-            vehicle.move(self.traffic_lights, should_stop)
+            # Park behind a vehicle blocking the turn until it moves; a
+            # pedestrian in the way, traffic to yield to or a full
+            # intersection exit is re-checked every step
+            if turn_blocker is not None:
+                self.scheduler.park(vehicle, turn_blocker)
+        profiler.lap("vehicle_checks")
 
-        # Remove vehicles that have reached their destination
-        self.vehicles = ap.AgentList(self, [v for v in self.vehicles if v.path])
-        # Remove pedestrians that reached destination
-        self.pedestrians = ap.AgentList(self, [p for p in self.pedestrians if p.path])
+        # Move all vehicles at once, re-sort their lanes and wake followers
+        self._advance(self.vehicle_state)
+        for vehicle in moving:
+            self.lane_index.update(vehicle)
+            self.scheduler.fire(vehicle)
+        profiler.lap("vehicle_moves")
 
-    def draw(self):
-        """Render all components in the scene."""
-        for vehicle in self.vehicles:
-            vehicle.draw()
+        # Retire agents that reached their destination into the pools
+        self.vehicles_completed += swap_remove_finished(
+            self.vehicles, self.vehicle_state, self._retire_vehicle
+        )
+        self.pedestrians_completed += swap_remove_finished(
+            self.pedestrians, self.pedestrian_state, self.pedestrian_pool.release
+        )
+        profiler.lap("retire")
 
-        for light in self.traffic_lights:
-            light.draw()
+        self.steps_run += 1
+        self.clock.tick()
+        if self.recorder is not None:
+            self.recorder.sample(self)
+            profiler.lap("record")
+        profiler.finish("step")
+        profiler.count("vehicles", len(self.vehicles))
+        profiler.count("vehicles_parked", len(self.scheduler))
+        profiler.count("pedestrians", len(self.pedestrians))
 
-        for block in self.stop_blocks:
-            block.draw()
+    def spawn_vehicle(self, entry=None, destination=None) -> VehicleAgent:
+        vehicle = self.vehicle_pool.acquire(entry=entry, destination=destination)
+        self.vehicles.append(vehicle)
+        self.lane_index.insert(vehicle)
+        self.vehicles_spawned += 1
+        return vehicle
 
-        for pedestrian in self.pedestrians:
-            pedestrian.draw()
+    def spawn_pedestrian(self, entry=None) -> PedestrianAgent:
+        pedestrian = self.pedestrian_pool.acquire(entry=entry)
+        self.pedestrians.append(pedestrian)
+        self.pedestrians_spawned += 1
+        return pedestrian
+
+    def _spread_on_route(self, vehicle, taken: set):
+        """Move a new vehicle to a free spot along its route.
+
+        Spots lie at multiples of the safe distance along each lane and
+        outside the intersections, so vehicles sharing a lane never start
+        closer than that; `taken` collects the used (lane, spot) pairs.
+        """
+        spacing = vehicle.safe_distance
+        boxes = self.road_network.intersections.values()
+        x, z = self.road_network.entries[vehicle.origin]
+        waypoints = vehicle.path
+        spots = []
+        for index, (bx, _, bz) in enumerate(waypoints):
+            length = math.hypot(bx - x, bz - z)
+            hx, hz = (bx - x) / length, (bz - z) / length
+            key = (hx, hz, round(z * hx - x * hz))
+            start = x * hx + z * hz
+            for spot in range(
+                math.ceil(start / spacing), math.ceil((start + length) / spacing)
+            ):
+                sx = x + hx * (spot * spacing - start)
+                sz = z + hz * (spot * spacing - start)
+                if not any(
+                    x_min <= sx <= x_max and z_min <= sz <= z_max
+                    for x_min, x_max, z_min, z_max in boxes
+                ):
+                    spots.append(((key, spot), (sx, sz), index))
+            x, z = bx, bz
+
+        free = [spot for spot in spots if spot[0] not in taken]
+        if not free:
+            return
+        slot, (x, z), index = self.random.choice(free)
+        taken.add(slot)
+        vehicle.place_on_route((x, z), waypoints[index:])
+        self.lane_index.update(vehicle)
+
+    def _spread_pedestrian(self, taken: set):
+        """Start a pedestrian at a free sidewalk spot along its route.
+
+        Spots lie every PEDESTRIAN_START_SPACING along the route, off the
+        roads; `taken` collects the used grid cells. Without a free spot
+        the pedestrian is queued at its entry instead of spawned there.
+        """
+        pedestrian = self.pedestrian_pool.acquire()
+        spacing = PEDESTRIAN_START_SPACING
+        waypoints = pedestrian.path
+        x, _, z = pedestrian.position
+        spots = []
+        for index, (bx, _, bz) in enumerate(waypoints):
+            length = math.hypot(bx - x, bz - z)
+            for step in range(math.ceil(length / spacing)):
+                sx = x + (bx - x) * step * spacing / length
+                sz = z + (bz - z) * step * spacing / length
+                cell = (round(sx / spacing), round(sz / spacing))
+                on_road = any(x1 < sx < x2 and z1 < sz < z2 for x1, z1, x2, z2 in ROADS)
+                if not on_road and cell not in taken:
+                    spots.append((cell, (sx, sz), index))
+            x, z = bx, bz
+
+        if not spots:
+            waiting = self.pedestrian_arrivals.waiting
+            waiting[pedestrian.direction] = waiting.get(pedestrian.direction, 0) + 1
+            self.pedestrian_pool.release(pedestrian)
+            return
+        cell, (x, z), index = self.random.choice(spots)
+        taken.add(cell)
+        pedestrian.position = [x, 0.0, z]
+        pedestrian.path = waypoints[index:]
+        self.pedestrians.append(pedestrian)
+        self.pedestrians_spawned += 1
+
+    def _vehicle_entry_clear(self, entry) -> bool:
+        """Check that no vehicle still occupies the start of an entry lane"""
+        x, z = self.road_network.entries[entry]
+        hx, _ = self.road_network.entry_heading(entry)
+        if hx == 0:
+            dx, dz = VEHICLE_SPAWN_HALF_WIDTH, VEHICLE_SPAWN_CLEARANCE
+        else:
+            dx, dz = VEHICLE_SPAWN_CLEARANCE, VEHICLE_SPAWN_HALF_WIDTH
+        return self.vehicle_state.count_in_box(x - dx, x + dx, z - dz, z + dz) == 0
+
+    def _pedestrian_entry_clear(self, entry) -> bool:
+        """Check that the sidewalk zones of an entry have room for one more"""
+        zones = SPAWN_ZONES[entry]
+        waiting = 0
+        for zone in zones:
+            if "x_range" in zone:
+                x_min, x_max = zone["x_range"]
+                z_min = zone["z"] - PEDESTRIAN_ZONE_DEPTH
+                z_max = zone["z"] + PEDESTRIAN_ZONE_DEPTH
+            else:
+                x_min = zone["x"] - PEDESTRIAN_ZONE_DEPTH
+                x_max = zone["x"] + PEDESTRIAN_ZONE_DEPTH
+                z_min, z_max = zone["z_range"]
+            waiting += self.pedestrian_state.count_in_box(x_min, x_max, z_min, z_max)
+        return waiting < PEDESTRIAN_ZONE_CAPACITY * len(zones)
+
+    def _retire_vehicle(self, vehicle):
+        self.lane_index.remove(vehicle)
+        self.scheduler.fire(vehicle)
+        self.scheduler.discard(vehicle)
+        self.vehicle_pool.release(vehicle)
+
+    def _advance(self, store):
+        """Run the vectorized move kernel and hand out reached waypoints"""
+        for slot in store.advance(self.clock.dt):
+            store.agents[slot].reach_waypoint()
+
+    def summary(self) -> dict:
+        """Return key performance indicators of the run so far"""
+        return {
+            "steps": self.steps_run,
+            "simulated_time_s": self.clock.now,
+            "vehicles_spawned": self.vehicles_spawned,
+            "vehicles_completed": self.vehicles_completed,
+            "vehicles_active": len(self.vehicles),
+            "vehicles_parked": len(self.scheduler),
+            "vehicles_waiting_to_spawn": len(self.vehicle_arrivals),
+            "pedestrians_spawned": self.pedestrians_spawned,
+            "pedestrians_completed": self.pedestrians_completed,
+            "pedestrians_active": len(self.pedestrians),
+            "pedestrians_waiting_to_spawn": len(self.pedestrian_arrivals),
+            "vehicle_stop_ratio": (
+                self.vehicle_stopped_steps / self.vehicle_steps
+                if self.vehicle_steps
+                else 0.0
+            ),
+        }
 
     def _is_pedestrian_in_vehicle_path(self, vehicle, pedestrian, safe_distance=20.0):
         """Check if pedestrian is in vehicle's path and needs to be avoided"""
@@ -1,10 +1,138 @@
 # objects/objloader.py
+import ctypes
+import hashlib
+import json
 import os
+import re
+import sys
+import warnings
+import numpy as np
 import pygame
 from OpenGL.GL import *
 
+# Binary mesh cache written next to each OBJ asset
+MESH_CACHE_MAGIC = b'OBJMESH1'
+MESH_CACHE_VERSION = 1
+MESH_CACHE_SUFFIX = '.meshcache'
+_MESH_CACHE_ALIGN = 16
+
+
+def mesh_cache_path(filename, swapyz=False):
+    variant = '.swapyz' if swapyz else ''
+    return filename + variant + MESH_CACHE_SUFFIX
+
+
+def mesh_source_hash(filename):
+    """SHA-256 of an OBJ file and every MTL file it references"""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data)
+    dirname = os.path.dirname(filename)
+    for match in re.finditer(rb'^mtllib\s+(\S+)', data, re.MULTILINE):
+        mtl_path = os.path.join(dirname, match.group(1).decode())
+        if os.path.exists(mtl_path):
+            with open(mtl_path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _aligned(offset):
+    return (offset + _MESH_CACHE_ALIGN - 1) // _MESH_CACHE_ALIGN * _MESH_CACHE_ALIGN
+
+
+def _records(tag, text):
+    """Return the bodies of every `tag` record in normalized OBJ text"""
+    return re.findall(r'\n' + tag + r'[ \t]+(.*)', text)
+
+
+def _token_starts(raw):
+    """Byte offsets where a whitespace separated token begins"""
+    blank = (raw == ord(' ')) | (raw == ord('\t')) | (raw == ord('\n'))
+    starts = ~blank
+    starts[1:] &= blank[:-1]
+    return np.flatnonzero(starts)
+
+
+def _tokens_per_row(raw, starts):
+    newlines = np.flatnonzero(raw == ord('\n'))
+    return np.diff(np.searchsorted(starts, newlines), prepend=0, append=len(starts))
+
+
+def _numbers(text, dtype, count):
+    """Convert whitespace separated numbers in C, falling back to str.split"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        values = np.fromstring(text, dtype=dtype, sep=' ')
+    if len(values) != count:
+        values = np.array(text.split(), dtype=dtype)
+    return values
+
+
+def _float_records(rows, width):
+    """Convert the bodies of v/vn/vt records into an (n, width) float array"""
+    if not rows:
+        return np.zeros((0, width))
+    body = '\n'.join(rows)
+    raw = np.frombuffer(body.encode(), dtype=np.uint8)
+    starts = _token_starts(raw)
+    lengths = _tokens_per_row(raw, starts)
+    if lengths.min() == lengths.max() >= width:
+        values = _numbers(body, np.float64, len(starts))
+        return values.reshape(len(rows), -1)[:, :width]
+    # Ragged records (optional w components), pad and trim row by row
+    return np.array(
+        [(row.split() + ['0'] * width)[:width] for row in rows], dtype=np.float64)
+
+
+def _face_records(rows):
+    """Split the bodies of f records into per-corner index arrays
+
+    Accepts the v, v/vt, v//vn and v/vt/vn corner forms. Returns vertex,
+    texcoord and normal indices (0 where missing) and the corner count of
+    each face.
+    """
+    if not rows:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, empty, empty
+    # Spell out empty index fields as 0 so every field is a number
+    body = re.sub(r'/(?=\s|$)', '/0', '\n'.join(rows).replace('//', '/0/'))
+    raw = np.frombuffer(body.encode(), dtype=np.uint8)
+    starts = _token_starts(raw)
+    counts = _tokens_per_row(raw, starts)
+    slash_positions = np.flatnonzero(raw == ord('/'))
+    slashes = np.diff(np.searchsorted(slash_positions, np.append(starts, len(raw))))
+    if slashes.min() == slashes.max():
+        fields = int(slashes[0]) + 1
+        ids = _numbers(body.replace('/', ' '), np.int32, len(starts) * fields)
+        ids = ids.reshape(-1, fields)
+    else:
+        # Corner forms mixed within the file, pad each corner separately
+        fields = 3
+        ids = np.array(
+            [(token.split('/') + ['0', '0'])[:3] for token in body.split()], dtype=np.int32)
+    ids = np.pad(ids, ((0, 0), (0, 3 - fields)))
+    return ids[:, 0], ids[:, 1], ids[:, 2], counts
+
+
+# Interleaved vertex layout: position (3), normal (3), texcoord (2)
+VERTEX_FLOATS = 8
+VERTEX_STRIDE = VERTEX_FLOATS * 4
+
+
+def vbo_supported():
+    """Check the current context for vertex buffer objects"""
+    try:
+        return bool(glGenBuffers) and bool(glBindBuffer) and bool(glBufferData)
+    except Exception:
+        return False
+
+
 class OBJ:
     generate_on_init = True
+    use_buffers = True
+    vbo = 0
+    batches = ()
+    _faces = None
 
     @classmethod
     def loadTexture(cls, imagefile):
@@ -42,55 +170,202 @@ class OBJ:
         return contents
 
     def __init__(self, filename, swapyz=False):
-        self.vertices = []
-        self.normals = []
-        self.texcoords = []
-        self.faces = []
-        self.gl_list = 0
-        dirname = os.path.dirname(filename)
-        material = None
-        for line in open(filename, "r"):
-            if line.startswith('#'):
-                continue
-            values = line.split()
-            if not values:
-                continue
-            if values[0] == 'v':
-                v = list(map(float, values[1:4]))
-                if swapyz:
-                    v = (v[0], v[2], v[1])
-                self.vertices.append(v)
-            elif values[0] == 'vn':
-                v = list(map(float, values[1:4]))
-                if swapyz:
-                    v = (v[0], v[2], v[1])
-                self.normals.append(v)
-            elif values[0] == 'vt':
-                self.texcoords.append(list(map(float, values[1:3])))
-            elif values[0] in ('usemtl', 'usemat'):
-                material = values[1]
-            elif values[0] == 'mtllib':
-                self.mtl = self.loadMaterial(os.path.join(dirname, values[1]))
-            elif values[0] == 'f':
-                face = []
-                texcoords = []
-                norms = []
-                for v in values[1:]:
-                    w = v.split('/')
-                    face.append(int(w[0]))
-                    if len(w) >= 2 and len(w[1]) > 0:
-                        texcoords.append(int(w[1]))
-                    else:
-                        texcoords.append(0)
-                    if len(w) >= 3 and len(w[2]) > 0:
-                        norms.append(int(w[2]))
-                    else:
-                        norms.append(0)
-                self.faces.append((face, norms, texcoords, material))
+        self._parse(filename, swapyz)
         if self.generate_on_init:
             self.generate()
 
+    @classmethod
+    def load(cls, filename, swapyz=False, use_cache=True):
+        """Load a mesh without compiling it, going through the binary cache
+
+        A valid cache is memory-mapped instead of parsing the text. On a
+        miss the OBJ is parsed and the cache (re)written for next time.
+        """
+        if not use_cache:
+            obj = cls.__new__(cls)
+            obj._parse(filename, swapyz)
+            return obj
+
+        source_hash = mesh_source_hash(filename)
+        cache_path = mesh_cache_path(filename, swapyz)
+        obj = cls.from_cache(cache_path, source_hash)
+        if obj is None:
+            obj = cls.__new__(cls)
+            obj._parse(filename, swapyz)
+            try:
+                obj.save_cache(cache_path, source_hash)
+            except OSError:
+                pass  # Read-only asset directory, keep working uncached
+        return obj
+
+    def save_cache(self, path, source_hash):
+        """Write vertex, normal and index arrays plus the material table"""
+        arrays = {
+            'vertices': np.asarray(self.vertices, dtype=np.float32).reshape(-1, 3),
+            'normals': np.asarray(self.normals, dtype=np.float32).reshape(-1, 3),
+            'texcoords': np.asarray(self.texcoords, dtype=np.float32).reshape(-1, 2),
+            'face_vertices': self.face_vertices,
+            'face_normals': self.face_normals,
+            'face_texcoords': self.face_texcoords,
+            'face_offsets': self.face_offsets,
+            'face_materials': self.face_materials,
+        }
+        mtl = {
+            name: {k: v for k, v in values.items() if k != 'texture_Kd'}
+            for name, values in getattr(self, 'mtl', {}).items()
+        }
+
+        table = {}
+        offset = 0
+        for name, array in arrays.items():
+            offset = _aligned(offset)
+            table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+        header = json.dumps({
+            'version': MESH_CACHE_VERSION,
+            'source_hash': source_hash,
+            'has_mtl': hasattr(self, 'mtl'),
+            'mtl': mtl,
+            'materials': self.materials,
+            'arrays': table,
+        }).encode()
+
+        data_start = _aligned(len(MESH_CACHE_MAGIC) + 4 + len(header))
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MESH_CACHE_MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + table[name]['offset'])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_cache(cls, path, source_hash=None):
+        """Memory-map a cached mesh, or return None if missing or stale"""
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(MESH_CACHE_MAGIC)) != MESH_CACHE_MAGIC:
+                    return None
+                header_size = int.from_bytes(f.read(4), 'little')
+                header = json.loads(f.read(header_size))
+        except (OSError, ValueError):
+            return None
+        if header.get('version') != MESH_CACHE_VERSION:
+            return None
+        if source_hash is not None and header.get('source_hash') != source_hash:
+            return None
+
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        data_start = _aligned(len(MESH_CACHE_MAGIC) + 4 + header_size)
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            start = data_start + spec['offset']
+            count = int(np.prod(spec['shape']))
+            arrays[name] = (
+                data[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+            )
+
+        obj = cls.__new__(cls)
+        obj.gl_list = 0
+        obj.vertices = arrays['vertices']
+        obj.normals = arrays['normals']
+        obj.texcoords = arrays['texcoords']
+        obj.materials = header['materials']
+        obj.face_vertices = arrays['face_vertices']
+        obj.face_normals = arrays['face_normals']
+        obj.face_texcoords = arrays['face_texcoords']
+        obj.face_offsets = arrays['face_offsets']
+        obj.face_materials = arrays['face_materials']
+        if header['has_mtl']:
+            obj.mtl = header['mtl']
+            dirname = os.path.dirname(path)
+            for values in obj.mtl.values():
+                if 'map_Kd' in values:
+                    values['texture_Kd'] = cls.loadTexture(os.path.join(dirname, values['map_Kd']))
+        return obj
+
+    def _parse(self, filename, swapyz):
+        """Parse OBJ text in bulk
+
+        Each record type is pulled out of the whole file with one regular
+        expression and converted with a few NumPy operations.
+        """
+        self.gl_list = 0
+        dirname = os.path.dirname(filename)
+        with open(filename, 'r') as f:
+            # Anchor every record on a newline without leading whitespace
+            text = re.sub(r'\n[ \t]+', '\n', '\n' + f.read())
+        for mtllib in _records('mtllib', text):
+            self.mtl = self.loadMaterial(os.path.join(dirname, mtllib.split()[0]))
+
+        self.vertices = _float_records(_records('v', text), 3)
+        self.normals = _float_records(_records('vn', text), 3)
+        self.texcoords = _float_records(_records('vt', text), 2)
+        if swapyz:
+            self.vertices = self.vertices[:, [0, 2, 1]]
+            self.normals = self.normals[:, [0, 2, 1]]
+
+        # Faces take the material of the last usemtl before them
+        chunks = re.split(r'\n(?:usemtl|usemat)[ \t]+(\S+)', text)
+        face_rows = []
+        material_ids = {}
+        face_materials = [np.zeros(0, dtype=np.int32)]
+        for material, chunk in zip([None] + chunks[1::2], chunks[0::2]):
+            rows = _records('f', chunk)
+            face_rows.extend(rows)
+            if material is None:
+                material_id = -1
+            else:
+                material_id = material_ids.setdefault(material, len(material_ids))
+            face_materials.append(np.full(len(rows), material_id, dtype=np.int32))
+
+        self.materials = list(material_ids)
+        self.face_materials = np.concatenate(face_materials)
+        self.face_vertices, self.face_texcoords, self.face_normals, counts = (
+            _face_records(face_rows))
+        self.face_offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+        np.cumsum(counts, out=self.face_offsets[1:])
+
+    @property
+    def faces(self):
+        """Per-face (vertices, normals, texcoords, material) index tuples
+
+        Built from the columnar face arrays on first use; the fast paths
+        read those arrays directly.
+        """
+        if self._faces is None:
+            counts = np.diff(self.face_offsets)
+            materials = [self.materials[m] if m >= 0 else None
+                         for m in self.face_materials.tolist()]
+            columns = (self.face_vertices, self.face_normals, self.face_texcoords)
+            if len(counts) and counts.min() == counts.max():
+                # Uniform polygons, let NumPy build the per-face lists
+                shape = (len(counts), int(counts[0]))
+                self._faces = list(zip(*(c.reshape(shape).tolist() for c in columns), materials))
+            else:
+                columns = [c.tolist() for c in columns]
+                bounds = self.face_offsets.tolist()
+                self._faces = [
+                    tuple(c[a:b] for c in columns) + (material,)
+                    for a, b, material in zip(bounds[:-1], bounds[1:], materials)
+                ]
+        return self._faces
+
+    @property
+    def compiled(self):
+        return bool(self.gl_list or self.vbo)
+
     def generate(self):
+        """Upload the mesh to GL, as buffer objects when the context allows"""
+        if self.use_buffers and vbo_supported():
+            self.generate_buffers()
+        else:
+            self.generate_list()
+
+    def generate_list(self):
         self.gl_list = glGenLists(1)
         glNewList(self.gl_list, GL_COMPILE)
         glEnable(GL_TEXTURE_2D)
@@ -113,8 +388,204 @@ class OBJ:
         glDisable(GL_TEXTURE_2D)
         glEndList()
 
+    def generate_buffers(self):
+        vertex_data, self.batches = self.material_batches()
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
     def render(self):
-        glCallList(self.gl_list)
+        if self.vbo:
+            self._render_buffers()
+        else:
+            glCallList(self.gl_list)
+
+    def _render_buffers(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(12))
+        glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(24))
+        glEnable(GL_TEXTURE_2D)
+        glFrontFace(GL_CCW)
+        for material, first, count in self.batches:
+            mtl = self.mtl[material]
+            if 'texture_Kd' in mtl:
+                glBindTexture(GL_TEXTURE_2D, mtl['texture_Kd'])
+            else:
+                glColor(*mtl['Kd'])
+            glDrawArrays(GL_TRIANGLES, first, count)
+        glDisable(GL_TEXTURE_2D)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def material_batches(self):
+        """Triangulate faces into one interleaved vertex array grouped by material
+
+        Polygons are split into fans. Returns the float32 array with
+        VERTEX_FLOATS per vertex and a list of (material, first, count)
+        ranges, one per material in order of first use. Corners without a
+        normal get the flat normal of their triangle.
+        """
+        counts = np.diff(self.face_offsets)
+        triangle_counts = np.maximum(counts - 2, 0)
+        face_ids = np.repeat(np.arange(len(counts)), triangle_counts)
+        first_triangle = np.cumsum(triangle_counts) - triangle_counts
+        fan = np.arange(len(face_ids)) - np.repeat(first_triangle, triangle_counts)
+
+        # Group triangles by material, materials in order of first use
+        used, first_use = np.unique(self.face_materials, return_index=True)
+        used = used[np.argsort(first_use)]
+        rank = np.zeros(len(self.materials) + 1, dtype=np.int64)
+        rank[used + 1] = np.arange(len(used))
+        triangle_rank = rank[self.face_materials[face_ids] + 1]
+        order = np.argsort(triangle_rank, kind='stable')
+        face_ids, fan = face_ids[order], fan[order]
+
+        batches = []
+        first = 0
+        triangles_per_material = np.bincount(triangle_rank, minlength=len(used))
+        for material, triangles in zip(used.tolist(), triangles_per_material.tolist()):
+            name = self.materials[material] if material >= 0 else None
+            batches.append((name, first, 3 * triangles))
+            first += 3 * triangles
+
+        base = self.face_offsets[face_ids]
+        corners = np.stack([base, base + fan + 1, base + fan + 2], axis=1).ravel()
+        corners_v = self.face_vertices[corners]
+        data = np.zeros((len(corners), VERTEX_FLOATS), dtype=np.float32)
+        if not len(corners):
+            return data, batches
+        vertex_table = np.asarray(self.vertices, dtype=np.float32).reshape(-1, 3)
+        data[:, 0:3] = vertex_table[corners_v - 1]
+
+        corners_n = self.face_normals[corners]
+        triangles = data[:, 0:3].reshape(-1, 3, 3)
+        flat = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        length = np.linalg.norm(flat, axis=1, keepdims=True)
+        flat = np.divide(flat, length, out=np.zeros_like(flat), where=length > 0)
+        data[:, 3:6] = np.repeat(flat, 3, axis=0)
+        has_normal = corners_n > 0
+        if has_normal.any():
+            normal_table = np.asarray(self.normals, dtype=np.float32).reshape(-1, 3)
+            data[has_normal, 3:6] = normal_table[corners_n[has_normal] - 1]
+
+        corners_t = self.face_texcoords[corners]
+        has_texcoord = corners_t > 0
+        if has_texcoord.any():
+            texcoord_table = np.asarray(self.texcoords, dtype=np.float32).reshape(-1, 2)
+            data[has_texcoord, 6:8] = texcoord_table[corners_t[has_texcoord] - 1]
+        return data, batches
+
+    def triangle_arrays(self):
+        """Triangulate faces into flat position, normal and color arrays
+
+        Built from material_batches; textured materials fall back to white.
+        """
+        data, batches = self.material_batches()
+        colors = np.ones((len(data), 3), dtype=np.float32)
+        for material, first, count in batches:
+            mtl = self.mtl[material]
+            if 'texture_Kd' not in mtl:
+                colors[first:first + count] = mtl.get('Kd', [1.0, 1.0, 1.0])[:3]
+        return data[:, 0:3].copy(), data[:, 3:6].copy(), colors
 
     def free(self):
-        glDeleteLists([self.gl_list])
+        if self.gl_list:
+            glDeleteLists(self.gl_list, 1)
+            self.gl_list = 0
+        if self.vbo:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = 0
+            self.batches = ()
+
+
+class MeshRegistry:
+    """Process-wide cache of OBJ meshes shared by every agent that draws them.
+
+    Each file is parsed once. The compiled GL handles are shared by all
+    holders and reference counted, so it is freed when the last holder
+    releases it and compiled again on the next acquire.
+    """
+
+    def __init__(self):
+        self._entries = {}  # key -> [mesh, refcount]
+        self._keys = {}  # id(mesh) -> key
+        self.hits = 0
+        self.misses = 0
+        self.compiles = 0
+        self.frees = 0
+
+    @staticmethod
+    def _key(filename, swapyz):
+        return (os.path.abspath(filename), bool(swapyz))
+
+    def acquire(self, filename, swapyz=False) -> OBJ:
+        """Return the shared mesh for a file, loading it on first use"""
+        key = self._key(filename, swapyz)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            mesh = OBJ.load(filename, swapyz=swapyz)
+            entry = self._entries[key] = [mesh, 0]
+            self._keys[id(mesh)] = key
+        else:
+            self.hits += 1
+
+        mesh = entry[0]
+        if not mesh.compiled:
+            mesh.generate()
+            self.compiles += 1
+        entry[1] += 1
+        return mesh
+
+    def release(self, mesh):
+        """Drop one reference to a mesh and free its GL handle when unused"""
+        key = self._keys.get(id(mesh))
+        if key is None:
+            return
+        entry = self._entries[key]
+        entry[1] = max(entry[1] - 1, 0)
+        if entry[1] == 0 and mesh.compiled:
+            mesh.free()
+            self.frees += 1
+
+    def refcount(self, filename, swapyz=False) -> int:
+        entry = self._entries.get(self._key(filename, swapyz))
+        return entry[1] if entry else 0
+
+    def stats(self) -> dict:
+        """Return cache counters for inspection"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "compiles": self.compiles,
+            "frees": self.frees,
+            "meshes": len(self._entries),
+            "live_handles": sum(1 for mesh, _ in self._entries.values() if mesh.compiled),
+            "references": sum(refs for _, refs in self._entries.values()),
+        }
+
+    def clear(self):
+        """Free every cached mesh, e.g. before the GL context is destroyed"""
+        for mesh, _ in self._entries.values():
+            mesh.free()
+        self._entries.clear()
+        self._keys.clear()
+
+
+# Shared registry used by all agents
+mesh_registry = MeshRegistry()
+
+
+if __name__ == '__main__':
+    # Offline compile step: python -m objects.objloader assets/models/*.obj
+    for obj_path in sys.argv[1:]:
+        for swap in (False, True):
+            OBJ.load(obj_path, swapyz=swap)
+            print('cached', mesh_cache_path(obj_path, swap))
@@ -0,0 +1,103 @@
+# objects/signal_plan.py
+import heapq
+import itertools
+from bisect import bisect_right
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Pop change events a hair early so float rounding never delays a change
+_EPSILON = 1e-9
+
+
+class SignalPlan:
+    """Fixed-time phase sequence evaluated in closed form.
+
+    The state at any time is a modulo and a bisect over the phase start
+    times, so nothing needs to be stepped to know the current phase or
+    when it will change next.
+    """
+
+    def __init__(self, phases: Sequence[Tuple[object, float]]):
+        if not phases:
+            raise ValueError("A signal plan needs at least one phase")
+        self.states = [state for state, _ in phases]
+        self.starts = []
+        elapsed = 0.0
+        for _, duration in phases:
+            if duration <= 0:
+                raise ValueError("Phase durations must be positive")
+            self.starts.append(elapsed)
+            elapsed += duration
+        self.cycle_time = elapsed
+
+    def _phase_index(self, cycle_position: float) -> int:
+        return bisect_right(self.starts, cycle_position) - 1
+
+    def state_at(self, time: float, offset: float = 0.0):
+        """Return the phase state at a given time"""
+        cycle_position = (time + offset) % self.cycle_time
+        return self.states[self._phase_index(cycle_position)]
+
+    def next_change_time(self, time: float, offset: float = 0.0) -> float:
+        """Return the first time after `time` at which the phase changes"""
+        cycle_position = (time + offset) % self.cycle_time
+        index = self._phase_index(cycle_position)
+        if index + 1 < len(self.starts):
+            phase_end = self.starts[index + 1]
+        else:
+            phase_end = self.cycle_time
+        return time + (phase_end - cycle_position)
+
+
+class SignalController:
+    """Drives many traffic lights from their plans and emits change events.
+
+    Lights sit in a min-heap keyed by their next change time, so an update
+    only touches lights whose phase actually changes. Subscribers are called
+    as ``callback(light, state, time)`` instead of polling every step.
+    """
+
+    def __init__(self):
+        self.lights = []
+        self._heap: List[Tuple[float, int, object]] = []
+        self._counter = itertools.count()
+        self._subscribers: List[Callable] = []
+        self._light_subscribers: Dict[int, List[Callable]] = {}
+        self._synced = set()
+
+    def add(self, light):
+        """Register a light; it is synchronised on the next update"""
+        self.lights.append(light)
+        heapq.heappush(self._heap, (float("-inf"), next(self._counter), light))
+
+    def subscribe(self, callback: Callable, light=None):
+        """Call `callback` on phase changes of one light or of every light"""
+        if light is None:
+            self._subscribers.append(callback)
+        else:
+            self._light_subscribers.setdefault(id(light), []).append(callback)
+
+    def next_change_time(self) -> float:
+        """Earliest upcoming phase change across all lights"""
+        return self._heap[0][0] if self._heap else float("inf")
+
+    def update(self, now: float):
+        """Apply every phase change due by `now` and notify subscribers"""
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, light = heapq.heappop(heap)
+            state = light.plan.state_at(now, light.phase_offset)
+            if state != light.current_state or id(light) not in self._synced:
+                self._synced.add(id(light))
+                light.set_state(state)
+                self._notify(light, state, now)
+
+            next_change = light.next_change_time(now) - _EPSILON
+            if next_change <= now:
+                next_change = now + _EPSILON
+            heapq.heappush(heap, (next_change, next(self._counter), light))
+
+    def _notify(self, light, state, now):
+        for callback in self._light_subscribers.get(id(light), ()):
+            callback(light, state, now)
+        for callback in self._subscribers:
+            callback(light, state, now)
@@ -0,0 +1 @@
+"""Rendering package containing the optional OpenGL drawing layer."""
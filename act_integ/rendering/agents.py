@@ -0,0 +1,33 @@
+# rendering/agents.py
+import os
+
+from OpenGL.GL import *
+
+from rendering.primitives import primitive_pool
+
+VEHICLE_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "Car.obj"
+)
+
+
+def draw_vehicle(position, rotation, scale, mesh):
+    """Render a vehicle with its shared 3D model"""
+    if mesh is None:
+        return
+
+    glPushMatrix()
+    glTranslatef(*position)
+    glRotatef(rotation, 0, 1, 0)
+    glScalef(scale, scale, scale)
+    glRotatef(270, 1, 0, 0)
+    mesh.render()
+    glPopMatrix()
+
+
+def draw_pedestrian(position, size, color):
+    """Render pedestrian as colored sphere"""
+    glPushMatrix()
+    glTranslatef(*position)
+    glColor3f(*color)
+    primitive_pool.sphere(size)
+    glPopMatrix()
@@ -0,0 +1,281 @@
+# rendering/capture.py
+import ctypes
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import pygame
+from OpenGL.GL import *
+
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD  # From EGL_MESA_platform_surfaceless
+
+
+def offscreen_supported() -> bool:
+    """Check the current context for framebuffer and pixel buffer objects"""
+    try:
+        return bool(glGenFramebuffers) and bool(glGenBuffers) and bool(glMapBuffer)
+    except Exception:
+        return False
+
+
+def _egl_display():
+    """Surfaceless EGL display where supported, else the default one
+
+    Headless Mesa has no native display for eglGetDisplay to open unless
+    EGL_PLATFORM=surfaceless is set, so the surfaceless platform is asked
+    for explicitly when the client extensions offer it.
+    """
+    from OpenGL import EGL
+
+    extensions = EGL.eglQueryString(EGL.EGL_NO_DISPLAY, EGL.EGL_EXTENSIONS) or b""
+    if b"EGL_MESA_platform_surfaceless" in extensions.split():
+        display = EGL.eglGetPlatformDisplayEXT(
+            EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None
+        )
+        if display:
+            return display
+    return EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+
+
+def create_headless_context(width: int, height: int):
+    """Create a GL context without a visible window.
+
+    Follows PYOPENGL_PLATFORM, which must be set before OpenGL is first
+    imported: "osmesa" renders in software on CPU-only machines, "egl"
+    uses a surfaceless pbuffer. Otherwise a hidden pygame window provides
+    the context. Returns an object that must be kept alive while drawing.
+    """
+    platform = os.environ.get("PYOPENGL_PLATFORM", "")
+    if platform == "osmesa":
+        from OpenGL import arrays, osmesa
+
+        context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        buffer = arrays.GLubyteArray.zeros((height, width, 4))
+        if not osmesa.OSMesaMakeCurrent(
+            context, buffer, GL_UNSIGNED_BYTE, width, height
+        ):
+            raise RuntimeError("Could not make the OSMesa context current")
+        return context, buffer
+    if platform == "egl":
+        from OpenGL import EGL
+
+        display = _egl_display()
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        version = ctypes.pointer(major), ctypes.pointer(minor)
+        if not EGL.eglInitialize(display, *version):
+            raise RuntimeError("Could not initialize EGL")
+        attributes = (EGL.EGLint * 13)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE,
+        )  # fmt: skip
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        EGL.eglChooseConfig(
+            display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count)
+        )
+        if not count.value:
+            raise RuntimeError("No EGL config supports desktop OpenGL")
+        size = (EGL.EGLint * 5)(
+            EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE
+        )
+        surface = EGL.eglCreatePbufferSurface(display, config, size)
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(display, surface, surface, context):
+            raise RuntimeError("Could not make the EGL context current")
+        return display, surface, context
+
+    pygame.init()
+    return pygame.display.set_mode(
+        (width, height), pygame.DOUBLEBUF | pygame.OPENGL | pygame.HIDDEN
+    )
+
+
+class OffscreenTarget:
+    """Framebuffer object with color and depth renderbuffers"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.framebuffer = glGenFramebuffers(1)
+        self.color, self.depth = glGenRenderbuffers(2)
+
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferRenderbuffer(
+            GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color
+        )
+        glFramebufferRenderbuffer(
+            GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth
+        )
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self.free()
+            raise RuntimeError(f"Offscreen framebuffer incomplete: {status:#x}")
+
+    def bind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, self.width, self.height)
+
+    def unbind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def free(self):
+        glDeleteRenderbuffers(2, [self.color, self.depth])
+        glDeleteFramebuffers(1, [self.framebuffer])
+        self.framebuffer = self.color = self.depth = 0
+
+
+class AsyncFrameReader:
+    """Reads frames back through a ring of pixel buffer objects.
+
+    glReadPixels into a bound pack buffer returns without waiting for the
+    GPU; each buffer is only mapped `depth - 1` frames later, by which time
+    its copy has finished. Frames come out as (height, width, 3) uint8
+    arrays, top row first.
+    """
+
+    def __init__(self, width: int, height: int, depth: int = 3):
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height * 3
+        self.buffers = list(np.atleast_1d(glGenBuffers(depth)))
+        for buffer in self.buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.frame_bytes, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending = deque()
+        self._next = 0
+
+    def read(self) -> Optional[np.ndarray]:
+        """Start reading the bound framebuffer; return the oldest finished frame"""
+        buffer = self.buffers[self._next]
+        self._next = (self._next + 1) % len(self.buffers)
+
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        glReadPixels(
+            0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0)
+        )
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending.append(buffer)
+
+        if len(self.pending) < len(self.buffers):
+            return None
+        return self._map(self.pending.popleft())
+
+    def flush(self):
+        """Yield every frame still in flight, oldest first"""
+        while self.pending:
+            yield self._map(self.pending.popleft())
+
+    def _map(self, buffer) -> np.ndarray:
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        data = ctypes.string_at(address, self.frame_bytes)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        frame = np.frombuffer(data, dtype=np.uint8)
+        return frame.reshape(self.height, self.width, 3)[::-1]
+
+    def free(self):
+        glDeleteBuffers(len(self.buffers), self.buffers)
+        self.buffers = []
+        self.pending.clear()
+
+
+class FrameEncoder(threading.Thread):
+    """Writes captured frames on a background thread.
+
+    An output ending in .mp4 is piped to ffmpeg; anything else is a
+    directory that receives numbered PNG files. submit() only blocks when
+    `queue_size` frames are already waiting, which bounds memory.
+    """
+
+    def __init__(
+        self, output: str, width: int, height: int, fps: int = 30, queue_size: int = 16
+    ):
+        super().__init__(name="frame-encoder", daemon=True)
+        self.output = output
+        self.width = width
+        self.height = height
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.error = None  # First exception of the writer thread
+        self.process = None
+
+        if output.lower().endswith(".mp4"):
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError("Recording to .mp4 needs ffmpeg on the PATH")
+            self.process = subprocess.Popen(
+                [
+                    ffmpeg, "-y", "-loglevel", "error",
+                    "-f", "rawvideo", "-pix_fmt", "rgb24",
+                    "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                    "-pix_fmt", "yuv420p", "-vcodec", "libx264", output,
+                ],
+                stdin=subprocess.PIPE,
+            )  # fmt: skip
+        else:
+            os.makedirs(output, exist_ok=True)
+        self.start()
+
+    def submit(self, frame: np.ndarray):
+        if self.error is not None:
+            raise RuntimeError("Frame encoder failed") from self.error
+        self.frames.put(frame)
+
+    def run(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            # After a failure keep draining, so submit() and close() never
+            # block on a full queue; the error is raised from there
+            if self.error is not None:
+                continue
+            try:
+                self._write(frame)
+            except Exception as error:
+                self.error = error
+
+    def _write(self, frame: np.ndarray):
+        if self.process is not None:
+            self.process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        else:
+            surface = pygame.image.frombuffer(
+                np.ascontiguousarray(frame).tobytes(),
+                (self.width, self.height),
+                "RGB",
+            )
+            path = os.path.join(self.output, f"frame_{self.written:06d}.png")
+            pygame.image.save(surface, path)
+        self.written += 1
+
+    def close(self):
+        """Write out every queued frame and finish the file"""
+        self.frames.put(None)
+        self.join()
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError as error:  # ffmpeg already exited
+                self.error = self.error or error
+            self.process.wait()
+        if self.error is not None:
+            raise RuntimeError("Frame encoder failed") from self.error
@@ -0,0 +1,63 @@
+# rendering/hud.py
+import time
+
+import pygame
+from OpenGL.GL import *
+
+HUD_REFRESH_S = 0.25  # Re-render the text a few times per second, not every frame
+
+
+class ProfilerHUD:
+    """Text overlay with a profiler's rolling phase percentiles and counts"""
+
+    def __init__(self, profiler, font_size=14, margin=8):
+        self.profiler = profiler
+        self.font_size = font_size
+        self.margin = margin
+        self.font = None
+        self.pixels = None
+        self.size = (0, 0)
+        self._refreshed_at = 0.0
+
+    def _lines(self):
+        stats = self.profiler.percentiles()
+        lines = [f"{'phase':<18}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+        for phase, row in stats.items():
+            lines.append(
+                f"{phase:<18}{row['p50']:>8.2f}{row['p95']:>8.2f}{row['p99']:>8.2f}"
+            )
+        for name, value in sorted(self.profiler.latest_counts().items()):
+            lines.append(f"{name:<18}{value:>8}")
+        return lines
+
+    def _refresh(self):
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.SysFont("monospace", self.font_size)
+        rows = [self.font.render(line, True, (255, 255, 255)) for line in self._lines()]
+        width = max(row.get_width() for row in rows) + 2 * self.margin
+        height = sum(row.get_height() for row in rows) + 2 * self.margin
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        y = self.margin
+        for row in rows:
+            surface.blit(row, (self.margin, y))
+            y += row.get_height()
+        self.pixels = pygame.image.tostring(surface, "RGBA", True)
+        self.size = (width, height)
+
+    def draw(self, window_height):
+        """Blit the overlay into the top-left corner of the window"""
+        now = time.perf_counter()
+        if self.pixels is None or now - self._refreshed_at >= HUD_REFRESH_S:
+            self._refresh()
+            self._refreshed_at = now
+
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glWindowPos2i(0, window_height - self.size[1])
+        glDrawPixels(*self.size, GL_RGBA, GL_UNSIGNED_BYTE, self.pixels)
+        glPopAttrib()
@@ -0,0 +1,207 @@
+# rendering/instancing.py
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+from rendering.primitives import sphere_arrays
+
+# Vertex attribute locations shared by every instanced mesh
+A_POSITION, A_NORMAL, A_COLOR = 0, 1, 2
+I_TRANSFORM, I_SCALE, I_COLOR = 3, 4, 5
+
+# Per-instance record: x, y, z, yaw (radians), scale, r, g, b
+INSTANCE_FLOATS = 8
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 a_position;
+attribute vec3 a_normal;
+attribute vec3 a_color;
+attribute vec4 i_transform;
+attribute float i_scale;
+attribute vec3 i_color;
+varying vec3 v_color;
+
+vec3 rotate_y(vec3 v, float c, float s) {
+    // Same rotation as glRotatef(yaw, 0, 1, 0)
+    return vec3(c * v.x + s * v.z, v.y, -s * v.x + c * v.z);
+}
+
+void main() {
+    float c = cos(i_transform.w);
+    float s = sin(i_transform.w);
+    vec3 world = rotate_y(a_position * i_scale, c, s) + i_transform.xyz;
+    vec4 eye = gl_ModelViewMatrix * vec4(world, 1.0);
+    vec3 normal = normalize(gl_NormalMatrix * rotate_y(a_normal, c, s));
+
+    // Ambient and diffuse terms of GL_LIGHT0 with GL_COLOR_MATERIAL
+    vec4 light_pos = gl_LightSource[0].position;
+    vec3 light = normalize(light_pos.xyz - eye.xyz * light_pos.w);
+    float diffuse = max(dot(normal, light), 0.0);
+    vec3 base = a_color * i_color;
+    v_color = base * (gl_LightModel.ambient.rgb
+                      + gl_LightSource[0].ambient.rgb
+                      + gl_LightSource[0].diffuse.rgb * diffuse);
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_color;
+
+void main() {
+    gl_FragColor = vec4(v_color, 1.0);
+}
+"""
+
+
+def instancing_supported() -> bool:
+    """Check the current context for shaders and instanced arrays"""
+    try:
+        return (
+            bool(glCreateShader)
+            and bool(glDrawArraysInstanced)
+            and bool(glVertexAttribDivisor)
+        )
+    except Exception:
+        return False
+
+
+def build_instances(positions, yaw_degrees, scales, colors) -> np.ndarray:
+    """Pack per-agent transforms and colors into one float32 array"""
+    count = len(positions)
+    instances = np.empty((count, INSTANCE_FLOATS), dtype=np.float32)
+    if count == 0:
+        return instances
+    instances[:, 0:3] = positions
+    instances[:, 3] = np.radians(yaw_degrees)
+    instances[:, 4] = scales
+    instances[:, 5:8] = colors
+    return instances
+
+
+def create_instancing_program():
+    program = glCreateProgram()
+    glAttachShader(program, shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER))
+    glAttachShader(program, shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+    for location, name in (
+        (A_POSITION, "a_position"),
+        (A_NORMAL, "a_normal"),
+        (A_COLOR, "a_color"),
+        (I_TRANSFORM, "i_transform"),
+        (I_SCALE, "i_scale"),
+        (I_COLOR, "i_color"),
+    ):
+        glBindAttribLocation(program, location, name)
+    glLinkProgram(program)
+    if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+        raise RuntimeError(glGetProgramInfoLog(program))
+    return program
+
+
+class InstancedMesh:
+    """A mesh uploaded once and drawn for any number of instances per call"""
+
+    def __init__(self, positions, normals, colors=None):
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        normals = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+        if colors is None:
+            colors = np.ones_like(positions)
+        vertices = np.hstack([positions, normals, colors]).astype(np.float32)
+
+        self.vertex_count = len(vertices)
+        self.vertex_buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        self.instance_buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self, instances: np.ndarray):
+        """Draw every instance with one glDrawArraysInstanced call"""
+        if len(instances) == 0 or self.vertex_count == 0:
+            return
+
+        stride = 9 * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+        for location, offset in ((A_POSITION, 0), (A_NORMAL, 12), (A_COLOR, 24)):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(
+                location, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset)
+            )
+
+        # Orphan and refill the instance buffer every frame
+        stride = INSTANCE_FLOATS * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+        for location, size, offset in (
+            (I_TRANSFORM, 4, 0),
+            (I_SCALE, 1, 16),
+            (I_COLOR, 3, 20),
+        ):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(
+                location, size, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset)
+            )
+            glVertexAttribDivisor(location, 1)
+
+        glDrawArraysInstanced(GL_TRIANGLES, 0, self.vertex_count, len(instances))
+
+        # Leave the fixed-function pipeline as we found it
+        for location in (I_TRANSFORM, I_SCALE, I_COLOR):
+            glVertexAttribDivisor(location, 0)
+        for location in (A_POSITION, A_NORMAL, A_COLOR, I_TRANSFORM, I_SCALE, I_COLOR):
+            glDisableVertexAttribArray(location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def free(self):
+        glDeleteBuffers(2, [self.vertex_buffer, self.instance_buffer])
+        self.vertex_buffer = self.instance_buffer = 0
+
+
+class InstancedAgentRenderer:
+    """Draws all vehicles and all pedestrians with one call per mesh type"""
+
+    def __init__(self, vehicle_mesh):
+        self.program = create_instancing_program()
+
+        # Bake the model's fixed glRotatef(270, 1, 0, 0) into the vertices
+        positions, normals, colors = vehicle_mesh.triangle_arrays()
+        self.vehicle = InstancedMesh(
+            _rotate_x_270(positions), _rotate_x_270(normals), colors
+        )
+
+        positions, normals = sphere_arrays(8, 8)
+        self.pedestrian = InstancedMesh(positions, normals)
+
+    def draw(self, snapshot):
+        vehicles = snapshot.vehicles
+        pedestrians = snapshot.pedestrians
+
+        vehicle_instances = build_instances(
+            vehicles.positions, vehicles.rotations, vehicles.scales, vehicles.colors
+        )
+        # Personality color travels as a per-instance attribute
+        pedestrian_instances = build_instances(
+            pedestrians.positions,
+            pedestrians.rotations,
+            pedestrians.scales,
+            pedestrians.colors,
+        )
+
+        glUseProgram(self.program)
+        self.vehicle.draw(vehicle_instances)
+        self.pedestrian.draw(pedestrian_instances)
+        glUseProgram(0)
+
+    def free(self):
+        self.vehicle.free()
+        self.pedestrian.free()
+        glDeleteProgram(self.program)
+
+
+def _rotate_x_270(vectors: np.ndarray) -> np.ndarray:
+    # glRotatef(270, 1, 0, 0) maps (x, y, z) to (x, z, -y)
+    return np.stack([vectors[:, 0], vectors[:, 2], -vectors[:, 1]], axis=1)
@@ -0,0 +1,136 @@
+# rendering/primitives.py
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+
+def sphere_arrays(slices: int = 8, stacks: int = 8):
+    """Unit sphere as flat triangle position and normal arrays.
+
+    Matches the tessellation of ``glutSolidSphere(1.0, slices, stacks)``.
+    """
+    theta = np.linspace(0.0, np.pi, stacks + 1)  # From +Z to -Z like GLUT
+    phi = np.linspace(0.0, 2.0 * np.pi, slices + 1)
+    rings = np.stack(
+        [
+            np.outer(np.sin(theta), np.cos(phi)),
+            np.outer(np.sin(theta), np.sin(phi)),
+            np.outer(np.cos(theta), np.ones_like(phi)),
+        ],
+        axis=-1,
+    )
+
+    triangles = []
+    for i in range(stacks):
+        for j in range(slices):
+            a, b = rings[i, j], rings[i, j + 1]
+            c, d = rings[i + 1, j], rings[i + 1, j + 1]
+            if i > 0:
+                triangles.extend((a, c, b))
+            if i < stacks - 1:
+                triangles.extend((b, c, d))
+
+    positions = np.asarray(triangles, dtype=np.float32)
+    return positions, positions.copy()
+
+
+# Fixed tessellations shared by every pooled primitive
+SPHERE_SLICES = 16
+SPHERE_STACKS = 16
+CYLINDER_SLICES = 16
+DISK_SLICES = 32
+
+_CUBE_FACES = (
+    ((0, 0, 1), ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1))),
+    ((0, 0, -1), ((-1, -1, -1), (-1, 1, -1), (1, 1, -1), (1, -1, -1))),
+    ((1, 0, 0), ((1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1))),
+    ((-1, 0, 0), ((-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1))),
+    ((0, 1, 0), ((-1, 1, -1), (-1, 1, 1), (1, 1, 1), (1, 1, -1))),
+    ((0, -1, 0), ((-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1))),
+)
+
+
+class PrimitivePool:
+    """Unit cylinder, sphere, disk and cube compiled once and reused.
+
+    Replaces per-draw ``gluNewQuadric`` and GLUT tessellation: one shared
+    quadric builds every mesh into a display list at a fixed
+    tessellation, and callers only scale it into place. Normals are
+    renormalized inside each list so scaling keeps lighting correct.
+    """
+
+    def __init__(self):
+        self.lists = {}
+        self.quadric = None
+
+    def build(self):
+        """Compile all primitives; must run outside any glNewList block"""
+        if self.lists:
+            return
+        self.quadric = gluNewQuadric()
+        gluQuadricNormals(self.quadric, GLU_SMOOTH)
+        self.lists = {
+            "cylinder": self._compile(
+                lambda: gluCylinder(self.quadric, 1.0, 1.0, 1.0, CYLINDER_SLICES, 1)
+            ),
+            "sphere": self._compile(
+                lambda: gluSphere(self.quadric, 1.0, SPHERE_SLICES, SPHERE_STACKS)
+            ),
+            "disk": self._compile(
+                lambda: gluDisk(self.quadric, 0.0, 1.0, DISK_SLICES, 1)
+            ),
+            "cube": self._compile(self._cube),
+        }
+
+    @staticmethod
+    def _compile(emit):
+        gl_list = glGenLists(1)
+        glNewList(gl_list, GL_COMPILE)
+        glPushAttrib(GL_ENABLE_BIT)
+        glEnable(GL_NORMALIZE)
+        emit()
+        glPopAttrib()
+        glEndList()
+        return gl_list
+
+    @staticmethod
+    def _cube():
+        glBegin(GL_QUADS)
+        for normal, corners in _CUBE_FACES:
+            glNormal3f(*normal)
+            for x, y, z in corners:
+                glVertex3f(x * 0.5, y * 0.5, z * 0.5)
+        glEnd()
+
+    def _draw(self, name, sx, sy, sz):
+        self.build()
+        glPushMatrix()
+        glScalef(sx, sy, sz)
+        glCallList(self.lists[name])
+        glPopMatrix()
+
+    def cylinder(self, radius: float, height: float):
+        """Cylinder along +Z from the origin, like ``gluCylinder``"""
+        self._draw("cylinder", radius, radius, height)
+
+    def sphere(self, radius: float):
+        self._draw("sphere", radius, radius, radius)
+
+    def disk(self, radius: float):
+        """Filled disk in the XY plane, like ``gluDisk`` with no hole"""
+        self._draw("disk", radius, radius, 1.0)
+
+    def cube(self, size: float = 1.0):
+        self._draw("cube", size, size, size)
+
+    def free(self):
+        for gl_list in self.lists.values():
+            glDeleteLists(gl_list, 1)
+        self.lists = {}
+        if self.quadric is not None:
+            gluDeleteQuadric(self.quadric)
+            self.quadric = None
+
+
+# Shared pool used by all scene drawing
+primitive_pool = PrimitivePool()
@@ -0,0 +1,92 @@
+# rendering/scene.py
+from models.snapshot import take_snapshot
+from objects.objloader import mesh_registry
+from rendering.agents import VEHICLE_MODEL_PATH, draw_pedestrian, draw_vehicle
+from rendering.instancing import InstancedAgentRenderer, instancing_supported
+from rendering.signals import draw_stop_block, draw_traffic_light
+
+
+class TrafficRenderer:
+    """Draws a TrafficModel. The model itself never touches OpenGL.
+
+    Agents are drawn with one instanced call per mesh type when the context
+    supports it, otherwise one display list or sphere per agent. Dynamic
+    state comes from a SceneSnapshot, so the model may be stepping on
+    another thread; only static light and block geometry is read from it.
+    """
+
+    def __init__(self, model, instanced=True):
+        self.model = model
+        self.instanced = instanced  # Resolved against the context on first draw
+        self.batch = None
+        self.vehicle_meshes = {}  # vehicle id -> shared mesh (per-agent path)
+        self._ready = False
+
+    def _setup(self):
+        self._ready = True
+        if self.instanced and instancing_supported():
+            mesh = mesh_registry.acquire(VEHICLE_MODEL_PATH, swapyz=True)
+            try:
+                self.batch = InstancedAgentRenderer(mesh)
+            finally:
+                mesh_registry.release(mesh)
+        else:
+            self.instanced = False
+
+    def _sync_vehicle_meshes(self, vehicle_ids):
+        """Acquire meshes for new vehicles and release those of removed ones"""
+        live_ids = set(vehicle_ids)
+        for vehicle_id in live_ids:
+            if vehicle_id not in self.vehicle_meshes:
+                self.vehicle_meshes[vehicle_id] = mesh_registry.acquire(
+                    VEHICLE_MODEL_PATH, swapyz=True
+                )
+
+        for vehicle_id in list(self.vehicle_meshes):
+            if vehicle_id not in live_ids:
+                mesh_registry.release(self.vehicle_meshes.pop(vehicle_id))
+
+    def draw(self, snapshot=None):
+        """Render all components in the scene.
+
+        Without a snapshot the current model state is captured first,
+        which is only safe when the model is stepped on this thread.
+        """
+        if not self._ready:
+            self._setup()
+        if snapshot is None:
+            snapshot = take_snapshot(self.model)
+
+        vehicles = snapshot.vehicles
+        pedestrians = snapshot.pedestrians
+        if self.instanced:
+            self.batch.draw(snapshot)
+        else:
+            vehicle_ids = vehicles.ids.tolist()
+            self._sync_vehicle_meshes(vehicle_ids)
+            for vehicle_id, position, rotation, scale in zip(
+                vehicle_ids, vehicles.positions, vehicles.rotations, vehicles.scales
+            ):
+                draw_vehicle(position, rotation, scale, self.vehicle_meshes[vehicle_id])
+
+        for light, state in zip(self.model.traffic_lights, snapshot.light_states):
+            draw_traffic_light(light, state)
+
+        for block, active in zip(self.model.stop_blocks, snapshot.block_active):
+            draw_stop_block(block, active)
+
+        if not self.instanced:
+            for position, size, color in zip(
+                pedestrians.positions, pedestrians.scales, pedestrians.colors
+            ):
+                draw_pedestrian(position, size, color)
+
+    def free(self):
+        """Release every GPU resource and mesh held by this renderer"""
+        if self.batch is not None:
+            self.batch.free()
+            self.batch = None
+        for mesh in self.vehicle_meshes.values():
+            mesh_registry.release(mesh)
+        self.vehicle_meshes.clear()
+        self._ready = False
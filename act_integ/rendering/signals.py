@@ -0,0 +1,91 @@
+# rendering/signals.py
+from OpenGL.GL import *
+
+from objects.traffic_light import LightState
+from rendering.primitives import primitive_pool
+
+
+def draw_traffic_light(light, state=None):
+    """Draw a light, optionally in a state taken from a snapshot"""
+    if not light.visible:
+        return
+
+    glPushMatrix()
+    glTranslatef(light.x, 0, light.z)
+
+    # Draw pole
+    glPushMatrix()
+    glRotatef(-90, 1, 0, 0)
+    glColor3f(0.576, 0.671, 0.62)
+    primitive_pool.cylinder(1.0, light.pole_height)
+    glPopMatrix()
+
+    # Draw box
+    glPushMatrix()
+    glTranslatef(0, light.pole_height, 0)
+    glColor3f(0.1, 0.1, 0.1)
+    primitive_pool.cube(light.box_size)
+    glPopMatrix()
+
+    # Draw lights with current state
+    _draw_lights(light, light.current_state if state is None else state)
+
+    glPopMatrix()
+
+
+def _draw_lights(light, state):
+    # Red light
+    glPushMatrix()
+    glTranslatef(0, light.pole_height + light.box_size / 4, light.light_offset_z)
+    if state == LightState.RED:
+        glColor3f(1.0, 0.0, 0.0)
+    else:
+        glColor3f(0.3, 0.0, 0.0)
+    primitive_pool.sphere(light.light_radius)
+    glPopMatrix()
+
+    # Yellow light
+    glPushMatrix()
+    glTranslatef(0, light.pole_height, light.light_offset_z)
+    if state == LightState.YELLOW:
+        glColor3f(1.0, 1.0, 0.0)
+    else:
+        glColor3f(0.3, 0.3, 0.0)
+    primitive_pool.sphere(light.light_radius)
+    glPopMatrix()
+
+    # Green light
+    glPushMatrix()
+    glTranslatef(0, light.pole_height - light.box_size / 4, light.light_offset_z)
+    if state == LightState.GREEN:
+        glColor3f(0.0, 1.0, 0.0)
+    else:
+        glColor3f(0.0, 0.3, 0.0)
+    primitive_pool.sphere(light.light_radius)
+    glPopMatrix()
+
+
+def draw_stop_block(block, active=None):
+    """Draw the stop block (for debugging)"""
+    if not block.visible:
+        return
+    if active is None:
+        active = block.active
+
+    glPushMatrix()
+    glTranslatef(block.x, 0.1, block.z)  # Slightly above ground
+
+    # Red when active, transparent green when inactive
+    if active:
+        glColor4f(1.0, 0.0, 0.0, 0.5)  # Semi-transparent red
+    else:
+        glColor4f(0.0, 1.0, 0.0, 0.3)  # Semi-transparent green
+
+    glBegin(GL_QUADS)
+    glVertex3f(-block.width / 2, 0, -block.depth / 2)
+    glVertex3f(block.width / 2, 0, -block.depth / 2)
+    glVertex3f(block.width / 2, 0, block.depth / 2)
+    glVertex3f(-block.width / 2, 0, block.depth / 2)
+    glEnd()
+
+    glPopMatrix()
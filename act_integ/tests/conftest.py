@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# The modules import each other as top-level packages (models, objects, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,37 @@
+# tests/test_agents.py
+import pytest
+
+from models.traffic_model import TrafficModel
+
+
+@pytest.fixture
+def model():
+    # No arrivals, so the test places every vehicle itself
+    return TrafficModel(
+        parameters={"seed": 1, "vehicle_demand": 0, "pedestrian_demand": 0}
+    )
+
+
+def _place(model, entry, destination, point, remaining):
+    """Spawn a vehicle and move it to `point`, before its last waypoints"""
+    vehicle = model.spawn_vehicle(entry, destination)
+    vehicle.place_on_route(point, vehicle.path[-remaining:])
+    model.lane_index.update(vehicle)
+    return vehicle
+
+
+@pytest.mark.parametrize("behind", [3.0, 10.0, 14.0])
+def test_turn_waits_for_stopped_vehicle_just_behind_the_corner(model, behind):
+    # main_E -> left_N turns north at (-57, 5) onto the lane main_W -> left_N
+    # vehicles use; one is stopped `behind` units short of the corner
+    turning = _place(model, "main_E", "left_N", (-70.0, 5.0), 2)
+    stopped = _place(model, "main_W", "left_N", (-57.0, 5.0 - behind), 1)
+    stopped.blocked = True
+    assert turning.must_yield_at_turn(model.lane_index)
+
+
+def test_turn_goes_ahead_of_stopped_vehicle_a_length_back(model):
+    turning = _place(model, "main_E", "left_N", (-70.0, 5.0), 2)
+    stopped = _place(model, "main_W", "left_N", (-57.0, 5.0 - 2 * turning.length), 1)
+    stopped.blocked = True
+    assert not turning.must_yield_at_turn(model.lane_index)
@@ -0,0 +1,79 @@
+# tests/test_arrivals.py
+import csv
+import math
+import random
+from bisect import bisect_right
+from collections import defaultdict
+
+import pytest
+
+from models.arrivals import PiecewiseRate, load_count_profiles
+
+
+@pytest.mark.parametrize("period", [1.1, 3.3, 900.1, 86400 / 7])
+def test_fractional_period_keeps_drawing(period):
+    # Cycle boundaries of these periods round onto piece ends; the draw
+    # used to stop advancing there and never return
+    profile = PiecewiseRate([0.0, period / 2], [0.0, 50 / period], period=period)
+    rng = random.Random(0)
+    time = 0.0
+    arrivals = 0
+    while time < 200 * period:
+        time = profile.next_arrival(time, rng)
+        arrivals += 1
+        if time < 200 * period:
+            assert time % period >= period / 2 * (1 - 1e-9)
+    assert arrivals / 200 == pytest.approx(25, rel=0.05)
+
+
+COUNTS = """entry,start_s,end_s,count
+left_N,0,900,12
+left_N,900,1800,30
+left_N,2400,3000,5
+main_E,600,1200,0
+main_E,1200,1500,40
+"""
+
+
+def _drawn_counts(profile, intervals, horizon, runs, rng):
+    """Mean arrivals per interval over `runs` draws up to `horizon`"""
+    drawn = [0] * len(intervals)
+    for _ in range(runs):
+        time = profile.next_arrival(0.0, rng)
+        while time < horizon:
+            index = bisect_right(intervals, (time, math.inf, math.inf)) - 1
+            assert index >= 0 and time < intervals[index][1], "arrival in a gap"
+            drawn[index] += 1
+            time = profile.next_arrival(time, rng)
+    return [total / runs for total in drawn]
+
+
+@pytest.mark.parametrize("period", [None, 3600.0])
+def test_count_profiles_match_the_csv(tmp_path, period):
+    # Covers the rate inversion per interval and the zero-rate gap filling
+    path = tmp_path / "counts.csv"
+    path.write_text(COUNTS)
+    observed = defaultdict(list)
+    for row in csv.DictReader(COUNTS.splitlines()):
+        observed[row["entry"]].append(
+            (float(row["start_s"]), float(row["end_s"]), float(row["count"]))
+        )
+
+    runs = 400
+    rng = random.Random(0)
+    profiles = load_count_profiles(str(path), period)
+    assert set(profiles) == set(observed)
+    for entry, profile in profiles.items():
+        intervals = sorted(observed[entry])
+        horizon = period if period is not None else intervals[-1][1]
+        means = _drawn_counts(profile, intervals, horizon, runs, rng)
+        for (start, end, count), mean in zip(intervals, means):
+            # Within four standard errors of a Poisson count
+            assert abs(mean - count) <= 4 * math.sqrt(count / runs), (entry, start)
+
+
+def test_count_interval_past_the_period_is_rejected(tmp_path):
+    path = tmp_path / "counts.csv"
+    path.write_text("start_s,end_s,count\n0,900,10\n900,2000,5\n")
+    with pytest.raises(ValueError, match="ends after"):
+        load_count_profiles(str(path), period=1800)
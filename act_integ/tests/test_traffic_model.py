@@ -0,0 +1,22 @@
+# tests/test_traffic_model.py
+from environment.sidewalk_network import ROADS
+from models.traffic_model import TrafficModel
+
+
+def _on_road(x, z):
+    return any(x1 < x < x2 and z1 < z < z2 for x1, z1, x2, z2 in ROADS)
+
+
+def test_starting_pedestrians_are_spread_off_the_roads():
+    model = TrafficModel(parameters={"seed": 1, "pedestrians": 100})
+    positions = [(p.position[0], p.position[2]) for p in model.pedestrians]
+    assert len(positions) == 100
+    assert not any(_on_road(x, z) for x, z in positions)
+    assert len({(round(x), round(z)) for x, z in positions}) == 100
+
+
+def test_starting_pedestrians_without_room_wait_to_spawn():
+    model = TrafficModel(parameters={"seed": 1, "pedestrians": 1000})
+    assert len(model.pedestrians) < 1000
+    assert len(model.pedestrians) + len(model.pedestrian_arrivals) == 1000
+    assert model.pedestrians_spawned == len(model.pedestrians)